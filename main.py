@@ -5,7 +5,8 @@ Main entry point for the REMIND system.
 import os
 import sys
 import logging
-import argparse
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 import config
 from src.memory_layer import MemoryLayer
 from src.prompt_handler import PromptHandler
@@ -13,30 +14,70 @@ from src.relevancer import Relevancer
 from src.response_generator import ResponseGenerator
 from src.memory_updater import MemoryUpdater
 
-# Check if we want to run in web mode
-if "--web" in sys.argv:
-    from web_interface.app import start_web_app
+HELP_TEXT = """usage: main.py [-h] [--cli] [--web] [--model MODEL] [--port PORT] [--host HOST] [--debug]
 
-def parse_args():
+REMIND - Retrieval of Episodic & Metadata-Indexed Information for Natural Dialogue
+
+options:
+  -h, --help     show this help message and exit
+  --cli          Run in CLI mode
+  --web          Run in web interface mode
+  --model MODEL  Claude model to use (default: {model})
+  --port PORT    Port for web interface (default: 5000)
+  --host HOST    Host for web interface (default: 127.0.0.1)
+  --debug        Run in debug mode"""
+
+USAGE_TEXT = HELP_TEXT.split("\n", 1)[0]
+
+def _arg_error(message):
+    """Print a usage error and exit, mirroring argparse's behaviour."""
+    print(USAGE_TEXT, file=sys.stderr)
+    print(f"main.py: error: {message}", file=sys.stderr)
+    sys.exit(2)
+
+def parse_args(argv=None):
     """Parse command-line arguments."""
-    parser = argparse.ArgumentParser(description="REMIND - Retrieval of Episodic & Metadata-Indexed Information for Natural Dialogue")
-    parser.add_argument("--cli", action="store_true", help="Run in CLI mode")
-    parser.add_argument("--web", action="store_true", help="Run in web interface mode")
-    parser.add_argument("--model", type=str, default=None, help=f"Claude model to use (default: {config.CLAUDE_MODEL})")
-    parser.add_argument("--port", type=int, default=5000, help="Port for web interface (default: 5000)")
-    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host for web interface (default: 127.0.0.1)")
-    parser.add_argument("--debug", action="store_true", help="Run in debug mode")
-    return parser.parse_args()
+    args = SimpleNamespace(cli=False, web=False, model=None, port=5000, host="127.0.0.1", debug=False)
+    it = iter(sys.argv[1:] if argv is None else argv)
+    
+    for arg in it:
+        # Support both "--flag value" and "--flag=value"
+        name, sep, value = arg.partition("=")
+        
+        if name in ("-h", "--help"):
+            print(HELP_TEXT.format(model=config.CLAUDE_MODEL))
+            sys.exit(0)
+        elif name in ("--cli", "--web", "--debug") and not sep:
+            setattr(args, name[2:], True)
+        elif name in ("--model", "--port", "--host"):
+            if not sep:
+                value = next(it, None)
+                if value is None:
+                    _arg_error(f"argument {name}: expected one argument")
+            if name == "--port":
+                try:
+                    value = int(value)
+                except ValueError:
+                    _arg_error(f"argument --port: invalid int value: '{value}'")
+            setattr(args, name[2:], value)
+        else:
+            _arg_error(f"unrecognized arguments: {arg}")
+    
+    return args
+
+def _finish_memory_update(update_future):
+    """Wait for a background memory update and report any error it raised."""
+    if update_future is None:
+        return
+    try:
+        update_future.result()
+    except Exception as e:
+        print(f"\nAn error occurred while updating memories: {e}")
 
 def run_cli_mode(args):
     """Run the system in CLI mode."""
     print("Starting REMIND in CLI mode...")
     
-    # Set up logging with correct level
-    log_level_int = getattr(logging, config.LOG_LEVEL, logging.INFO)
-    if args.debug:
-        log_level_int = logging.DEBUG
-    
     # Initialize components
     memory_layer = MemoryLayer()
     prompt_handler = PromptHandler()
@@ -51,12 +92,23 @@ def run_cli_mode(args):
     
     print("Type 'exit' to quit.")
     
+    # Enable line editing and history for input() where available
+    try:
+        import readline  # noqa: F401
+    except ImportError:
+        pass
+    
+    # Memory updates run in the background while the user types the next message
+    update_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-updater")
+    pending_update = None
+    
     # CLI loop
     while True:
         user_input = input("\nYou: ").strip()
         
         # Check if the user wants to exit
         if user_input.lower() in ["exit", "quit", "q"]:
+            _finish_memory_update(pending_update)
             print("Goodbye!")
             break
         
@@ -64,6 +116,10 @@ def run_cli_mode(args):
         if not user_input:
             continue
         
+        # Make sure the previous interaction is stored before retrieving memories
+        _finish_memory_update(pending_update)
+        pending_update = None
+        
         try:
             # Process the prompt
             processed_prompt = prompt_handler.process(user_input)
@@ -71,50 +127,50 @@ def run_cli_mode(args):
             # Retrieve relevant memories
             relevant_memories = relevancer.retrieve(processed_prompt)
             
-            # Generate a response
-            response = response_generator.generate(user_input, relevant_memories)
-            
-            # Update memories
-            memory_updater.update(user_input, response)
+            # Generate the response, printing it as it streams in
+            print("\nAssistant: ", end="", flush=True)
+            response_chunks = []
+            for chunk in response_generator.stream(user_input, relevant_memories):
+                print(chunk, end="", flush=True)
+                response_chunks.append(chunk)
+            print()
+            response = "".join(response_chunks)
             
-            # Print the response
-            print(f"\nAssistant: {response}")
+            # Update memories in the background
+            pending_update = update_executor.submit(memory_updater.update, user_input, response)
             
         except Exception as e:
             print(f"\nAn error occurred: {e}")
+    
+    update_executor.shutdown(wait=True)
 
 def main():
     """Main function."""
     args = parse_args()
     
-    # Override log level if in debug mode
-    if args.debug:
-        log_level_str = "DEBUG"
-        log_level_int = logging.DEBUG
-    else:
-        log_level_str = config.LOG_LEVEL
-        log_level_int = getattr(logging, config.LOG_LEVEL, logging.INFO)
-    
-    # Set up logging
-    logging.basicConfig(
-        level=log_level_int,
-        format=config.LOG_FORMAT,
-        handlers=[
-            logging.FileHandler(config.LOG_FILE),
-            logging.StreamHandler()
-        ]
-    )
-    
     # Update model if specified
     if args.model:
         config.CLAUDE_MODEL = args.model
     
+    # Set up logging only once a mode has been selected
+    if args.web or args.cli:
+        # config.py files generated before setup_logging() took a level
+        # don't accept one, so the debug level is applied afterwards
+        config.setup_logging()
+        if args.debug:
+            logging.getLogger().setLevel(logging.DEBUG)
+    
     # Run in the specified mode
     if args.web:
-        if "web_interface" in sys.modules:
-            start_web_app(host=args.host, port=args.port, debug=args.debug)
-        else:
+        # Only pay for importing Flask and the web app when web mode is requested
+        try:
+            from web_interface.app import start_web_app
+        except ImportError as e:
+            if e.name != "flask":
+                raise
             print("Error: Web interface mode requires Flask. Please install it with 'pip install flask'.")
+            return
+        start_web_app(host=args.host, port=args.port, debug=args.debug)
     elif args.cli:
         run_cli_mode(args)
     else:
@@ -50,14 +50,15 @@ def install_dependencies():
         "requests>=2.25.0"
     ]
     
-    # Install dependencies
     for dependency in dependencies:
-        print(f"  - Installing {dependency}...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", dependency])
-        except subprocess.CalledProcessError:
-            print_error(f"Failed to install {dependency}")
-            return False
+        print(f"  - {dependency}")
+    
+    # Install all dependencies with a single pip invocation so they are resolved together
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", *dependencies])
+    except subprocess.CalledProcessError:
+        print_error(f"Failed to install dependencies: {', '.join(dependencies)}")
+        return False
     
     print_success("Dependencies installed successfully!")
     return True
@@ -127,24 +128,56 @@ NON_EPISODIC_MEMORY_DIR = os.path.join("memory", "non_episodic")
 MAX_EPISODIC_MEMORIES = 1000
 MAX_NON_EPISODIC_MEMORIES = 500
 MEMORY_RETENTION_DAYS = 30  # Number of days to keep episodic memories
+MEMORY_CACHE_SIZE = 512  # Parsed memory files kept in memory between queries
 
 # Hook Configuration
 MAX_HOOKS_PER_MEMORY = 10
 MIN_HOOK_LENGTH = 2
 MAX_HOOK_LENGTH = 30
+HOOK_CACHE_SIZE = 256  # Generated hook lists kept for repeated texts
+STOPWORDS = frozenset([
+    "the", "and", "for", "are", "but", "not", "you", "your", "all", "any",
+    "can", "had", "has", "have", "her", "his", "him", "how", "its", "our",
+    "out", "was", "were", "who", "what", "when", "where", "why", "which",
+    "will", "with", "would", "could", "should", "this", "that", "these",
+    "those", "there", "their", "they", "them", "then", "than", "from",
+    "into", "about", "been", "being", "did", "does", "doing", "just",
+    "some", "such", "very", "also", "user", "assistant"
+])
+
+# API Response Cache Configuration
+# Set to a file path (e.g. "llm_cache.sqlite3") to reuse responses to identical
+# requests, which is mainly useful during development
+RESPONSE_CACHE_PATH = None
+RESPONSE_CACHE_MAX_ENTRIES = 10000
 
 # Retrieval Configuration
 MAX_MEMORIES_TO_RETRIEVE = 5
+RANKING_CACHE_SIZE = 128  # Memory rankings kept for repeated queries
 
 # Logging Configuration
 LOG_LEVEL = "INFO"  # String version for compatibility with getattr()
+LOG_LEVEL_INT = getattr(logging, LOG_LEVEL, logging.INFO)  # Resolved once at import
 LOG_FILE = "remind.log"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
 # Initialize logging
-def setup_logging():
-    \"\"\"Set up logging configuration.\"\"\"
-    log_level_int = getattr(logging, LOG_LEVEL, logging.INFO)
+def setup_logging(level=None):
+    \"\"\"
+    Set up logging configuration.
+    
+    Called once by the entry point after a run mode has been selected, so
+    importing this module does not open the log file. Handlers are only
+    constructed if the root logger has none yet.
+    
+    Args:
+        level (int, optional): Log level overriding LOG_LEVEL_INT. Defaults to None.
+    \"\"\"
+    root_logger = logging.getLogger()
+    if root_logger.handlers:
+        return
+    
+    log_level_int = LOG_LEVEL_INT if level is None else level
     logging.basicConfig(
         level=log_level_int,
         format=LOG_FORMAT,
@@ -153,9 +186,6 @@ def setup_logging():
             logging.StreamHandler()
         ]
     )
-
-# Call setup_logging() when this module is imported
-setup_logging()
 """
     
     # Check if config.py already exists
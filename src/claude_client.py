@@ -1,16 +1,304 @@
 """
 Utility module for creating an Anthropic client regardless of installed version.
 """
+import functools
+import hashlib
+import json
 import logging
 import os
+import sqlite3
+import threading
+import time
+import unicodedata
 import config
 
 logger = logging.getLogger(__name__)
 
+def _content_to_text(content):
+    """
+    Flatten a string or a list of content blocks into plain text.
+    
+    Args:
+        content (str or list): A prompt string or a list of content blocks.
+        
+    Returns:
+        str: The text content.
+    """
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+# Turn labels used by the legacy completion API, precomputed for the common roles
+COMPLETION_ROLE_LABELS = {"user": "Human", "assistant": "Assistant", "": ""}
+
+def _completion_role_label(role):
+    """
+    Get the completion API turn label for a message role.
+    
+    Args:
+        role (str): The message role (e.g. "user" or "assistant").
+        
+    Returns:
+        str: The turn label.
+    """
+    label = COMPLETION_ROLE_LABELS.get(role)
+    return label if label is not None else role.capitalize()
+
+class MessageResponse:
+    """A minimal stand-in for an SDK messages response, used by the fallback paths."""
+    
+    __slots__ = ("content",)
+    
+    def __init__(self, content):
+        """
+        Initialize the MessageResponse.
+        
+        Args:
+            content (list): The response content blocks.
+        """
+        self.content = content
+
+API_ERROR_TEXT = "I'm sorry, I couldn't process your request due to an API error."
+
+def get_response_text(response):
+    """
+    Extract the text of the first content block of a messages response.
+    
+    Every response returned by the client wrapper has a ``content`` list, whose
+    blocks are either SDK objects with a ``text`` attribute or plain dicts.
+    
+    Args:
+        response (object): A response returned by ``messages_create``.
+        
+    Returns:
+        str: The stripped response text, or an empty string if there is no content.
+    """
+    if not response.content:
+        return ""
+    block = response.content[0]
+    text = block["text"] if isinstance(block, dict) else block.text
+    return text.strip()
+
+# Anthropic SDK client shared by every wrapper, so all components reuse the
+# same pooled HTTP connections instead of each opening their own.
+_shared_sdk_client = None
+_shared_sdk_client_lock = threading.Lock()
+
+# Retry and timeout policy for API calls. The SDK retries rate limits and
+# transient errors itself with backoff that honours retry-after headers.
+API_MAX_RETRIES = 4
+API_TIMEOUT_SECONDS = 30.0
+
+# How often to check whether a Message Batches API request has finished
+BATCH_POLL_INTERVAL_SECONDS = 10.0
+# How long to wait for a batch before cancelling it and making the calls individually
+BATCH_MAX_WAIT_SECONDS = 30 * 60.0
+
+def _get_shared_sdk_client(anthropic, api_key):
+    """
+    Get the process-wide Anthropic SDK client, creating it on first use.
+    
+    Args:
+        anthropic (module): The imported anthropic module.
+        api_key (str): The Claude API key.
+        
+    Returns:
+        object: An anthropic.Anthropic client.
+    """
+    global _shared_sdk_client
+    with _shared_sdk_client_lock:
+        if _shared_sdk_client is None:
+            _shared_sdk_client = _build_sdk_client(anthropic, api_key)
+    return _shared_sdk_client
+
+def _build_sdk_client(anthropic, api_key):
+    """
+    Build an Anthropic SDK client with pooled connections and retries.
+    
+    Args:
+        anthropic (module): The imported anthropic module.
+        api_key (str): The Claude API key.
+        
+    Returns:
+        object: An anthropic.Anthropic client.
+    """
+    try:
+        import httpx
+    except ImportError:
+        return anthropic.Anthropic(
+            api_key=api_key,
+            max_retries=API_MAX_RETRIES,
+            timeout=API_TIMEOUT_SECONDS
+        )
+    
+    http_client_class = getattr(anthropic, 'DefaultHttpxClient', httpx.Client)
+    http_client = http_client_class(
+        limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+    )
+    return anthropic.Anthropic(
+        api_key=api_key,
+        http_client=http_client,
+        max_retries=API_MAX_RETRIES,
+        timeout=API_TIMEOUT_SECONDS
+    )
+
+# Pooled HTTP session for the direct API fallback, shared by every wrapper
+DIRECT_API_URL = "https://api.anthropic.com/v1/messages"
+_direct_api_session = None
+_direct_api_session_lock = threading.Lock()
+
+def _get_direct_api_session(api_key):
+    """
+    Get the pooled requests session used for direct API calls, creating it on first use.
+    
+    Args:
+        api_key (str): The Claude API key.
+        
+    Returns:
+        requests.Session: A session with pooled connections, retries and API headers.
+    """
+    global _direct_api_session
+    with _direct_api_session_lock:
+        if _direct_api_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            retry = Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(["POST"]),
+                raise_on_status=False
+            )
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+            session.headers.update({
+                "Content-Type": "application/json",
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01"
+            })
+            _direct_api_session = session
+    return _direct_api_session
+
+# Request parameters that don't affect the generated response, left out of cache keys
+RESPONSE_CACHE_IGNORED_PARAMS = frozenset(["timeout", "extra_headers", "metadata", "user"])
+DEFAULT_RESPONSE_CACHE_MAX_ENTRIES = 10000
+
+class ResponseCache:
+    """An SQLite-backed cache of message responses, keyed by a hash of the request."""
+    
+    def __init__(self, path, max_entries=DEFAULT_RESPONSE_CACHE_MAX_ENTRIES):
+        """
+        Initialize the ResponseCache.
+        
+        Args:
+            path (str): The path to the SQLite database file.
+            max_entries (int, optional): The number of responses to keep; the least
+                recently used are evicted. Defaults to DEFAULT_RESPONSE_CACHE_MAX_ENTRIES.
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, ts INTEGER NOT NULL)"
+            )
+    
+    @staticmethod
+    def make_key(params):
+        """
+        Build the cache key for a request.
+        
+        Args:
+            params (dict): The request parameters.
+            
+        Returns:
+            str: The SHA-256 hex digest of the canonicalized parameters.
+        """
+        canonical = json.dumps(
+            {key: value for key, value in params.items() if key not in RESPONSE_CACHE_IGNORED_PARAMS},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(unicodedata.normalize("NFC", canonical).encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        """
+        Get a cached response.
+        
+        Args:
+            key (str): The cache key.
+            
+        Returns:
+            MessageResponse: The cached response, or None on a miss.
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE llm_cache SET ts = ? WHERE key = ?", (time.time_ns(), key))
+        return MessageResponse(json.loads(row[0]))
+    
+    def put(self, key, response):
+        """
+        Cache the text content of a response, evicting the least recently used entries.
+        
+        Args:
+            key (str): The cache key.
+            response (object): The API response.
+        """
+        content = []
+        for block in response.content or []:
+            text = block.get("text") if isinstance(block, dict) else getattr(block, "text", None)
+            if text is not None:
+                content.append({"type": "text", "text": text})
+        
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, ts) VALUES (?, ?, ?)",
+                (key, json.dumps(content, ensure_ascii=False), time.time_ns())
+            )
+            self._connection.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def _get_response_cache():
+    """
+    Get the process-wide response cache, if one is configured.
+    
+    Caching is off unless config.RESPONSE_CACHE_PATH is set. It is meant for
+    development and replaying conversations, where identical requests recur.
+    
+    Returns:
+        ResponseCache: The response cache, or None if caching is disabled.
+    """
+    global _response_cache
+    path = getattr(config, "RESPONSE_CACHE_PATH", None)
+    if not path:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                path,
+                getattr(config, "RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_RESPONSE_CACHE_MAX_ENTRIES)
+            )
+    return _response_cache
+
+@functools.lru_cache(maxsize=1)
 def create_claude_client():
     """
     Create an Anthropic client that works with the installed version.
     
+    The SDK import and version probing only run once per process; every
+    component shares the same wrapper, which is safe because callers pass
+    their model explicitly on each call.
+    
     Returns:
         object: An Anthropic client object.
     """
@@ -33,7 +321,15 @@ def create_claude_client():
             self.api_key = config.CLAUDE_API_KEY
             self.model = config.CLAUDE_MODEL
             
-            # Create the underlying client
+            # The underlying client is created on first use, so constructing
+            # components does no SDK client setup work
+            self._client = None
+            self._client_type = None
+        
+        def _ensure_client(self):
+            """Create the underlying client if it has not been created yet."""
+            if self._client_type is not None:
+                return
             try:
                 self._create_client()
             except Exception as e:
@@ -45,9 +341,9 @@ def create_claude_client():
             try:
                 # Modern SDK approach (anthropic>=0.5.0)
                 try:
-                    self._client = anthropic.Anthropic(api_key=self.api_key)
+                    self._client = _get_shared_sdk_client(anthropic, self.api_key)
                     self._client_type = 'modern_anthropic'
-                    logger.info("Created client with modern Anthropic SDK")
+                    logger.info("Using shared client from modern Anthropic SDK")
                     return
                 except (TypeError, AttributeError) as e:
                     logger.debug(f"Could not create modern client: {e}")
@@ -74,10 +370,14 @@ def create_claude_client():
             """
             Compatibility method for message creation.
             
+            Responses are served from the response cache when one is configured
+            and the identical request has been made before.
+            
             Args:
                 model (str): The model to use.
                 messages (list): The messages to process.
-                system (str): The system prompt.
+                system (str or list): The system prompt, either as a string or as a list of
+                    content blocks (e.g. with cache_control for prompt caching).
                 max_tokens (int): The maximum number of tokens to generate.
                 temperature (float): The temperature to use.
                 **kwargs: Additional parameters.
@@ -85,6 +385,55 @@ def create_claude_client():
             Returns:
                 object: The API response.
             """
+            response_cache = _get_response_cache()
+            if response_cache is None:
+                return self._messages_create(model, messages, system, max_tokens, temperature, **kwargs)
+            
+            cache_key = ResponseCache.make_key(dict(
+                kwargs,
+                model=model or self.model,
+                messages=messages or [],
+                system=system,
+                max_tokens=max_tokens,
+                temperature=temperature
+            ))
+            try:
+                cached_response = response_cache.get(cache_key)
+            except sqlite3.Error as e:
+                logger.warning(f"Error reading response cache: {e}")
+                cached_response = None
+            if cached_response is not None:
+                logger.debug("Using cached API response")
+                return cached_response
+            
+            response = self._messages_create(model, messages, system, max_tokens, temperature, **kwargs)
+            
+            # Don't cache the placeholder returned when every API path failed
+            if get_response_text(response) != API_ERROR_TEXT:
+                try:
+                    response_cache.put(cache_key, response)
+                except sqlite3.Error as e:
+                    logger.warning(f"Error writing response cache: {e}")
+            return response
+        
+        def _messages_create(self, model=None, messages=None, system=None, max_tokens=1000, temperature=0.7, **kwargs):
+            """
+            Create a message, trying each available API path in turn.
+            
+            Args:
+                model (str): The model to use.
+                messages (list): The messages to process.
+                system (str or list): The system prompt, either as a string or as a list of
+                    content blocks (e.g. with cache_control for prompt caching).
+                max_tokens (int): The maximum number of tokens to generate.
+                temperature (float): The temperature to use.
+                **kwargs: Additional parameters.
+                
+            Returns:
+                object: The API response.
+            """
+            self._ensure_client()
+            
             if not model:
                 model = self.model
                 
@@ -94,8 +443,8 @@ def create_claude_client():
             if self._client_type == 'modern_anthropic':
                 # Modern SDK (anthropic>=0.5.0)
                 try:
-                    # FIXED: Ensure system is a string, not a list
-                    if system is not None and not isinstance(system, str):
+                    # Ensure system is a string or a list of content blocks
+                    if system is not None and not isinstance(system, (str, list)):
                         logger.warning(f"System prompt not a string: {type(system)}. Converting to string.")
                         system = str(system)
                         
@@ -116,8 +465,8 @@ def create_claude_client():
                 # Legacy client that might have completion but not messages
                 if hasattr(self._client, 'messages') and hasattr(self._client.messages, 'create'):
                     try:
-                        # FIXED: Ensure system is a string
-                        if system is not None and not isinstance(system, str):
+                        # Ensure system is a string or a list of content blocks
+                        if system is not None and not isinstance(system, (str, list)):
                             logger.warning(f"System prompt not a string: {type(system)}. Converting to string.")
                             system = str(system)
                             
@@ -135,20 +484,17 @@ def create_claude_client():
                         logger.info("Falling back to completion API")
                 
                 # Convert messages format to completion format
-                prompt = ""
+                prompt_parts = []
                 if system:
-                    # FIXED: Format system message correctly
-                    if isinstance(system, str):
-                        prompt += f"{system}\n\n"
-                    else:
-                        prompt += f"{str(system)}\n\n"
+                    # The completion API has no notion of content blocks, so flatten them
+                    prompt_parts.append(f"{_content_to_text(system)}\n\n")
                 
-                for msg in messages:
-                    role = msg.get('role', '')
-                    content = msg.get('content', '')
-                    prompt += f"{role}: {content}\n\n"
-                
-                prompt += "assistant: "
+                prompt_parts.extend(
+                    f"{_completion_role_label(msg.get('role', ''))}: {_content_to_text(msg.get('content', ''))}\n\n"
+                    for msg in messages
+                )
+                prompt_parts.append("Assistant: ")
+                prompt = "".join(prompt_parts)
                 
                 try:
                     completion_response = self._client.completion(
@@ -159,26 +505,14 @@ def create_claude_client():
                     )
                     
                     # Create a response object that mimics the messages API
-                    class MessageResponse:
-                        def __init__(self, text):
-                            self.content = [{"type": "text", "text": text}]
-                    
-                    return MessageResponse(completion_response.completion)
+                    return MessageResponse([{"type": "text", "text": completion_response.completion}])
                 except Exception as e:
                     logger.error(f"Error in completion fallback: {e}")
                     # Fallback to direct API call
                     logger.info("Falling back to direct API call")
             
             # Custom direct API implementation as a last resort
-            import requests
-            import json
-            
-            url = "https://api.anthropic.com/v1/messages"
-            headers = {
-                "Content-Type": "application/json",
-                "x-api-key": self.api_key,
-                "anthropic-version": "2023-06-01"
-            }
+            session = _get_direct_api_session(self.api_key)
             
             # FIXED: Ensure data structure is correct for the API
             data = {
@@ -188,24 +522,21 @@ def create_claude_client():
                 "messages": messages
             }
             
-            # FIXED: Ensure system is a string, not a list
+            # The messages endpoint accepts a string or a list of content blocks
             if system is not None:
-                if isinstance(system, str):
+                if isinstance(system, (str, list)):
                     data["system"] = system
                 else:
                     data["system"] = str(system)
             
             try:
-                logger.debug(f"Making direct API call with data: {json.dumps(data)[:500]}...")
-                response = requests.post(url, headers=headers, json=data)
+                # Only serialize the payload for the log when debug logging is on
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Making direct API call with data: {json.dumps(data)[:500]}...")
+                response = session.post(DIRECT_API_URL, json=data, timeout=(3.05, API_TIMEOUT_SECONDS))
                 response.raise_for_status()
                 result = response.json()
                 
-                # Create a response object similar to what the client would return
-                class MessageResponse:
-                    def __init__(self, content):
-                        self.content = content
-                
                 # Extract the content from the response
                 content = result.get("content", [])
                 return MessageResponse(content)
@@ -218,11 +549,137 @@ def create_claude_client():
                 logger.error(f"API Response text: {getattr(response, 'text', 'Unknown')[:500]}")
                 
                 # Return a default response object if all else fails
-                class MessageResponse:
-                    def __init__(self):
-                        self.content = [{"type": "text", "text": "I'm sorry, I couldn't process your request due to an API error."}]
+                return MessageResponse([{"type": "text", "text": API_ERROR_TEXT}])
+    
+        def messages_batch(self, requests, poll_interval=BATCH_POLL_INTERVAL_SECONDS, max_wait=BATCH_MAX_WAIT_SECONDS):
+            """
+            Run several message requests through the Message Batches API.
+            
+            Batched requests cost half as much as individual calls but can take
+            minutes to complete, so this blocks until the whole batch has ended.
+            Batches still running after max_wait seconds are cancelled. Clients
+            without batch support, and batches that fail or time out, fall back
+            to one messages_create call per request.
+            
+            Args:
+                requests (list): Keyword argument dicts, as accepted by messages_create.
+                poll_interval (float): Seconds to wait between batch status checks.
+                max_wait (float): Seconds to wait for the batch to end.
                 
-                return MessageResponse()
+            Returns:
+                list: The API responses in the same order as the requests, with
+                    None for requests that did not succeed.
+            """
+            self._ensure_client()
+            
+            if not requests:
+                return []
+            
+            batches = None
+            if self._client_type == 'modern_anthropic':
+                batches = getattr(self._client.messages, 'batches', None)
+            
+            if batches is not None:
+                try:
+                    batch_requests = []
+                    for i, request in enumerate(requests):
+                        params = {key: value for key, value in request.items() if value is not None}
+                        params.setdefault("model", self.model)
+                        params.setdefault("max_tokens", 1000)
+                        batch_requests.append({"custom_id": str(i), "params": params})
+                    
+                    batch = batches.create(requests=batch_requests)
+                    logger.info(f"Submitted message batch {batch.id} with {len(batch_requests)} requests")
+                    deadline = time.monotonic() + max_wait
+                    while batch.processing_status != "ended":
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._cancel_batch(batches, batch.id)
+                            raise TimeoutError(f"Message batch {batch.id} did not end within {max_wait} seconds")
+                        time.sleep(min(poll_interval, remaining))
+                        batch = batches.retrieve(batch.id)
+                    
+                    responses = [None] * len(requests)
+                    for entry in batches.results(batch.id):
+                        if entry.result.type == "succeeded":
+                            responses[int(entry.custom_id)] = entry.result.message
+                        else:
+                            logger.warning(f"Batched request {entry.custom_id} did not succeed: {entry.result.type}")
+                    return responses
+                except Exception as e:
+                    logger.error(f"Error in message batch call: {e}")
+                    logger.info("Falling back to individual calls")
+            
+            return [self.messages_create(**request) for request in requests]
+    
+        def _cancel_batch(self, batches, batch_id):
+            """
+            Cancel a message batch that is no longer being waited for.
+            
+            Args:
+                batches: The SDK's message batches resource.
+                batch_id (str): The ID of the batch to cancel.
+            """
+            try:
+                batches.cancel(batch_id)
+                logger.warning(f"Cancelled message batch {batch_id}")
+            except Exception as e:
+                logger.error(f"Error cancelling message batch {batch_id}: {e}")
+    
+        def messages_stream(self, model=None, messages=None, system=None, max_tokens=1000, temperature=0.7, **kwargs):
+            """
+            Stream the text of a message response as it is generated.
+            
+            Clients that cannot stream fall back to messages_create and yield
+            the whole response text as a single chunk.
+            
+            Args:
+                model (str): The model to use.
+                messages (list): The messages to process.
+                system (str or list): The system prompt, as for messages_create.
+                max_tokens (int): The maximum number of tokens to generate.
+                temperature (float): The temperature to use.
+                **kwargs: Additional parameters.
+                
+            Yields:
+                str: Chunks of response text.
+            """
+            self._ensure_client()
+            
+            if self._client_type == 'modern_anthropic' and hasattr(self._client.messages, 'stream'):
+                stream_kwargs = dict(kwargs)
+                if system is not None:
+                    stream_kwargs["system"] = system
+                
+                started = False
+                try:
+                    with self._client.messages.stream(
+                        model=model or self.model,
+                        messages=messages or [],
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        **stream_kwargs
+                    ) as stream:
+                        for text in stream.text_stream:
+                            started = True
+                            yield text
+                    return
+                except Exception as e:
+                    # Text already yielded cannot be taken back, so only fall back before the first chunk
+                    if started:
+                        raise
+                    logger.error(f"Error in modern client stream call: {e}")
+                    logger.info("Falling back to non-streaming call")
+            
+            response = self.messages_create(
+                model=model,
+                messages=messages,
+                system=system,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            yield get_response_text(response)
     
     # Create and return the client wrapper
     try:
@@ -3,11 +3,48 @@ Generates hooks for indexing memories using Claude.
 """
 import logging
 import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import config
-from src.claude_client import create_claude_client
+from src.claude_client import create_claude_client, get_response_text
+from src.utils import parse_json_array
 
 logger = logging.getLogger(__name__)
 
+# Hook generation instructions. They are identical on every call, so they are
+# formatted once and sent ahead of the text-specific part of the prompt.
+HOOK_INSTRUCTIONS_TEMPLATE = """
+        Please analyze the following text and generate up to {max_hooks} hooks for indexing and retrieval.
+        
+        Hooks should be one to three word phrases that capture key entities, concepts, sentiments, or themes in the text.
+        Good hooks are specific, diverse, and cover different aspects of the text.
+        Include both general topics and specific details as hooks.
+        
+        Examples of good hooks:
+        - For a text about a person's vacation: "beach trip", "summer vacation", "family bonding", "ocean swimming"
+        - For a technical article: "machine learning", "neural networks", "data science", "algorithm optimization"
+        - For a conversation about food: "favorite foods", "cooking recipes", "dietary preferences", "restaurant recommendations"
+        
+        Return ONLY a JSON array of strings, with each string being a hook.
+        Example: ["hook1", "hook2", "hook3"]
+        """
+
+# Patterns used on every call, compiled once
+QUOTED_TEXT_PATTERN = re.compile(r'"([^"]+)"')
+NON_WORD_PATTERN = re.compile(r'[^\w\s-]')
+CAPITALIZED_WORD_PATTERN = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Words never used as hooks on their own, as a frozenset for O(1) membership.
+# Config files generated before STOPWORDS was added fall back to no stopwords.
+STOPWORDS = frozenset(getattr(config, "STOPWORDS", ()))
+
+# Maximum number of hook generation calls in flight at once for a batch
+HOOK_BATCH_WORKERS = 4
+
+# Number of generated hook lists kept for texts that come up again
+DEFAULT_HOOK_CACHE_SIZE = 256
+
 class HookGenerator:
     """Generates hooks for indexing memories."""
     
@@ -17,6 +54,19 @@ class HookGenerator:
         # Use the faster model for hook generation to reduce costs and improve speed
         self.model = config.CLAUDE_FAST_MODEL
         self.max_hooks = config.MAX_HOOKS_PER_MEMORY
+        self.min_hook_length = config.MIN_HOOK_LENGTH
+        self.max_hook_length = config.MAX_HOOK_LENGTH
+        self.instructions_block = {
+            "type": "text",
+            "text": HOOK_INSTRUCTIONS_TEMPLATE.format(max_hooks=self.max_hooks)
+        }
+        # Hooks generated by Claude, keyed by whitespace-normalized text, so
+        # repeated texts (e.g. recurring prompts) skip the API call
+        self._hook_cache = OrderedDict()
+        self._hook_cache_size = getattr(config, "HOOK_CACHE_SIZE", DEFAULT_HOOK_CACHE_SIZE)
+        self._hook_cache_lock = threading.Lock()
+        # Hook generation for several texts is I/O bound, so batches run concurrently
+        self.executor = ThreadPoolExecutor(max_workers=HOOK_BATCH_WORKERS, thread_name_prefix="hook-generator")
         logger.info(f"HookGenerator initialized with model: {self.model}")
     
     def generate_hooks(self, text, existing_hooks=None):
@@ -36,6 +86,15 @@ class HookGenerator:
         
         logger.debug(f"Generating hooks for text (length: {len(text)})")
         
+        cache_key = self._hook_cache_key(text, existing_hooks)
+        with self._hook_cache_lock:
+            cached_hooks = self._hook_cache.get(cache_key)
+            if cached_hooks is not None:
+                self._hook_cache.move_to_end(cache_key)
+                logger.debug("Using cached hooks")
+                # Callers extend the returned list, so hand out a copy
+                return list(cached_hooks)
+        
         # FIXED: Add fallback method for faster hook generation without API if needed
         # Extract basic hooks from the text directly before using the API
         basic_hooks = self._extract_basic_hooks(text)
@@ -51,24 +110,11 @@ class HookGenerator:
             existing_hooks_str = "Consider the following existing hooks when generating new ones: " + ", ".join(existing_hooks)
         
         # FIXED: Improved prompting for better hook generation
+        # Only this part of the prompt changes between calls
         prompt = f"""
-        Please analyze the following text and generate up to {self.max_hooks} hooks for indexing and retrieval.
-        
-        Hooks should be one to three word phrases that capture key entities, concepts, sentiments, or themes in the text.
-        Good hooks are specific, diverse, and cover different aspects of the text.
-        Include both general topics and specific details as hooks.
-        
-        Examples of good hooks:
-        - For a text about a person's vacation: "beach trip", "summer vacation", "family bonding", "ocean swimming"
-        - For a technical article: "machine learning", "neural networks", "data science", "algorithm optimization"
-        - For a conversation about food: "favorite foods", "cooking recipes", "dietary preferences", "restaurant recommendations"
-        
         {existing_hooks_str}
         
         Text: {text}
-        
-        Return ONLY a JSON array of strings, with each string being a hook.
-        Example: ["hook1", "hook2", "hook3"]
         """
         
         try:
@@ -78,52 +124,32 @@ class HookGenerator:
                 max_tokens=1024,
                 temperature=0.3,
                 messages=[
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": [self.instructions_block, {"type": "text", "text": prompt}]}
                 ]
             )
             
             # Extract the text from the response
-            if hasattr(response, 'content') and isinstance(response.content, list) and len(response.content) > 0:
-                if isinstance(response.content[0], dict) and 'text' in response.content[0]:
-                    response_text = response.content[0]['text'].strip()
-                elif hasattr(response.content[0], 'text'):
-                    response_text = response.content[0].text.strip()
-                else:
-                    response_text = str(response.content[0]).strip()
-            else:
-                response_text = str(response).strip()
-            
-            # Extract the JSON array from the response
-            import json
-            import re
-            
-            # Find JSON array in the response
-            array_match = re.search(r'\[(.*?)\]', response_text, re.DOTALL)
-            if array_match:
-                try:
-                    # Try to parse the matched array
-                    hooks_json = f"[{array_match.group(1)}]"
-                    hooks = json.loads(hooks_json)
-                    
-                    # Filter out invalid hooks
-                    hooks = [hook.strip() for hook in hooks if isinstance(hook, str) and hook.strip()]
-                    
-                    # Limit the number of hooks
-                    hooks = hooks[:self.max_hooks]
-                    
-                    # FIXED: Combine with the basic hooks for more coverage
-                    combined_hooks = list(set(hooks + basic_hooks))
-                    
-                    logger.debug(f"Generated hooks: {combined_hooks}")
-                    return combined_hooks[:self.max_hooks]
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try to extract hooks directly from the text
-                    logger.warning("Failed to parse hook JSON, using fallback extraction")
-                    pass
+            response_text = get_response_text(response)
+            
+            # Parse the JSON array in the response
+            hooks = parse_json_array(response_text)
+            if hooks is not None:
+                # Filter out invalid hooks
+                hooks = [hook.strip() for hook in hooks if isinstance(hook, str) and hook.strip()]
+                
+                # FIXED: Combine with the basic hooks for more coverage
+                combined_hooks = self._combine_hooks(hooks, basic_hooks)
+                self._cache_hooks(cache_key, combined_hooks)
+                
+                logger.debug(f"Generated hooks: {combined_hooks}")
+                return combined_hooks
+            
+            # If JSON parsing fails, try to extract hooks directly from the text
+            logger.warning("Failed to parse hook JSON, using fallback extraction")
             
             # Fallback: extract hooks directly from the response
             # Look for quotes which likely contain hooks
-            hooks = re.findall(r'"([^"]+)"', response_text)
+            hooks = QUOTED_TEXT_PATTERN.findall(response_text)
             
             # If no quoted strings found, try comma-separated values
             if not hooks:
@@ -135,8 +161,8 @@ class HookGenerator:
             hooks = [hook.strip() for hook in hooks if hook.strip()]
             
             # Combine with basic hooks
-            combined_hooks = list(set(hooks + basic_hooks))
-            combined_hooks = combined_hooks[:self.max_hooks]
+            combined_hooks = self._combine_hooks(hooks, basic_hooks)
+            self._cache_hooks(cache_key, combined_hooks)
             
             logger.debug(f"Generated hooks (fallback method): {combined_hooks}")
             return combined_hooks
@@ -147,6 +173,73 @@ class HookGenerator:
             logger.info(f"Using basic hooks as fallback due to API error")
             return basic_hooks[:self.max_hooks]
     
+    def _hook_cache_key(self, text, existing_hooks):
+        """
+        Build the hook cache key for a text.
+        
+        Only whitespace is normalized. Case and punctuation change the hooks
+        generated (e.g. "Apple" the company and "apple" the fruit), so texts
+        that differ in them get separate entries.
+        
+        Args:
+            text (str): The text to generate hooks for.
+            existing_hooks (list): Existing hooks to consider, or None.
+            
+        Returns:
+            tuple: The cache key.
+        """
+        normalized_text = " ".join(text.split())
+        return (normalized_text, tuple(existing_hooks) if existing_hooks else ())
+    
+    def _cache_hooks(self, cache_key, hooks):
+        """
+        Add generated hooks to the hook cache, evicting the least recently used.
+        
+        Args:
+            cache_key (tuple): The key from _hook_cache_key.
+            hooks (list): The generated hooks.
+        """
+        with self._hook_cache_lock:
+            self._hook_cache[cache_key] = list(hooks)
+            self._hook_cache.move_to_end(cache_key)
+            while len(self._hook_cache) > self._hook_cache_size:
+                self._hook_cache.popitem(last=False)
+    
+    def _combine_hooks(self, hooks, basic_hooks):
+        """
+        Combine generated and basic hooks, dropping duplicates.
+        
+        Generated hooks come first, so they are kept ahead of basic hooks
+        when the combined list is limited to max_hooks.
+        
+        Args:
+            hooks (list): Hooks generated by Claude.
+            basic_hooks (list): Hooks extracted with simple NLP techniques.
+            
+        Returns:
+            list: Up to max_hooks unique hooks.
+        """
+        combined_hooks = dict.fromkeys(hooks)
+        combined_hooks.update(dict.fromkeys(basic_hooks))
+        return list(combined_hooks)[:self.max_hooks]
+    
+    def generate_hooks_batch(self, texts, existing_hooks=None):
+        """
+        Generate hooks for several pieces of text, running the API calls concurrently.
+        
+        Args:
+            texts (list): The texts to generate hooks for.
+            existing_hooks (list, optional): Existing hooks to consider. Defaults to None.
+            
+        Returns:
+            list: A list of hook lists, in the same order as the texts.
+        """
+        if len(texts) <= 1:
+            return [self.generate_hooks(text, existing_hooks) for text in texts]
+        
+        logger.debug(f"Generating hooks for a batch of {len(texts)} texts")
+        return list(self.executor.map(lambda text: self.generate_hooks(text, existing_hooks), texts))
+    
     def _extract_basic_hooks(self, text):
         """
         Extract basic hooks directly from the text without using an API call.
@@ -160,45 +253,34 @@ class HookGenerator:
         # Extract single words and compound terms
         
         # Normalize text: lowercase and remove punctuation except spaces and hyphens
-        normalized_text = re.sub(r'[^\w\s-]', ' ', text.lower())
+        normalized_text = NON_WORD_PATTERN.sub(' ', text.lower())
         
         # Split text into words
         words = normalized_text.split()
         
-        # Count word frequency
-        word_freq = {}
-        for word in words:
-            if len(word) > 2:  # Skip very short words
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Extract top frequent words as potential hooks
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        single_word_hooks = [word for word, freq in sorted_words[:10] if word not in config.STOPWORDS]
+        # Extract top frequent words as potential hooks, skipping very short words and stopwords
+        word_counts = Counter(word for word in words if len(word) > 2 and word not in STOPWORDS)
+        single_word_hooks = [word for word, freq in word_counts.most_common(10)]
         
         # Extract common phrases (2-3 word combinations)
         phrases = []
-        for i in range(len(words) - 1):
-            if words[i] not in config.STOPWORDS and len(words[i]) > 2:
-                # 2-word phrases
-                phrase = f"{words[i]} {words[i+1]}"
-                phrases.append(phrase)
-                
-                # 3-word phrases if possible
-                if i < len(words) - 2:
-                    phrase = f"{words[i]} {words[i+1]} {words[i+2]}"
-                    phrases.append(phrase)
-        
-        # Count phrase frequency
-        phrase_freq = {}
-        for phrase in phrases:
-            phrase_freq[phrase] = phrase_freq.get(phrase, 0) + 1
+        for first, second, third in zip(words, words[1:], words[2:] + [None]):
+            if first in STOPWORDS or len(first) <= 2:
+                continue
+            
+            # 2-word phrases
+            two_word_phrase = f"{first} {second}"
+            phrases.append(two_word_phrase)
+            
+            # 3-word phrases if possible
+            if third is not None:
+                phrases.append(f"{two_word_phrase} {third}")
         
         # Extract top frequent phrases
-        sorted_phrases = sorted(phrase_freq.items(), key=lambda x: x[1], reverse=True)
-        phrase_hooks = [phrase for phrase, freq in sorted_phrases[:10]]
+        phrase_hooks = [phrase for phrase, freq in Counter(phrases).most_common(10)]
         
         # Check for entities (names, locations, etc.) - simplified approach
-        potential_entities = re.findall(r'\b[A-Z][a-z]+\b', text)
+        potential_entities = CAPITALIZED_WORD_PATTERN.findall(text)
         entity_hooks = [entity.lower() for entity in potential_entities if len(entity) > 2][:5]
         
         # Combine all hooks and remove duplicates
@@ -207,4 +289,19 @@ class HookGenerator:
         # Filter hooks (remove duplicates and ensure minimum length)
         filtered_hooks = self.filter_hooks(all_hooks)
         
-        return filtered_hooks
\ No newline at end of file
+        return filtered_hooks
+    
+    def filter_hooks(self, hooks):
+        """
+        Filter hooks, dropping duplicates and hooks outside the configured length limits.
+        
+        Args:
+            hooks (list): The hooks to filter.
+            
+        Returns:
+            list: The unique hooks within the length limits, in their original order.
+        """
+        return list(dict.fromkeys(
+            hook for hook in hooks
+            if self.min_hook_length <= len(hook) <= self.max_hook_length
+        ))
@@ -3,20 +3,104 @@ Memory layer for storing and retrieving memories.
 """
 import os
 import json
+import calendar
+import functools
+import heapq
 import logging
 import re
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 import config
 from src.utils import (
+    ensure_directory,
     save_to_json_file,
     load_from_json_file,
     list_files_in_directory,
-    get_days_since_timestamp,
     generate_unique_filename
 )
 
 logger = logging.getLogger(__name__)
 
+# Date filter patterns and month names, compiled and built once
+ISO_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+MONTH_YEAR_PATTERN = re.compile(r'(\w+) (\d{4})')
+# Full dates written out, e.g. "april 13, 2025" or "13th of april 2025"
+MONTH_DAY_YEAR_PATTERN = re.compile(r'([a-z]+)\.? (\d{1,2})(?:st|nd|rd|th)?,? (\d{4})')
+DAY_MONTH_YEAR_PATTERN = re.compile(r'(\d{1,2})(?:st|nd|rd|th)? (?:of )?([a-z]+)\.?,? (\d{4})')
+# Characters that can appear in a formatted date, for rejecting text filters early
+DATE_TEXT_PATTERN = re.compile(r'[a-z0-9 ,-]+')
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4,
+    "may": 5, "june": 6, "july": 7, "august": 8,
+    "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, 
+    "jun": 6, "jul": 7, "aug": 8, "sep": 9, "oct": 10, 
+    "nov": 11, "dec": 12
+}
+
+# File, alongside the memory directories, that the hook index is saved to
+HOOK_INDEX_FILENAME = "hooks_index.json"
+
+# Default number of parsed memory files kept in memory between queries,
+# for config files generated before MEMORY_CACHE_SIZE was added
+DEFAULT_MEMORY_CACHE_SIZE = 512
+
+@functools.lru_cache(maxsize=4096)
+def _timestamp_date(timestamp):
+    """
+    Get the date of an ISO format timestamp, caching parses of repeated timestamps.
+    
+    Args:
+        timestamp (str): The ISO format timestamp.
+        
+    Returns:
+        date: The timestamp's date, or None if it can't be parsed.
+    """
+    try:
+        return datetime.fromisoformat(timestamp).date()
+    except ValueError:
+        return None
+
+def _sortable_timestamp(timestamp):
+    """
+    Get a timestamp as a string that compares chronologically.
+    
+    Timestamps are written with datetime.isoformat(), whose zero-padded form
+    already sorts chronologically, so those are used without parsing. Other
+    parseable timestamps are normalized; unparseable ones sort first.
+    
+    Args:
+        timestamp (str): The ISO format timestamp.
+        
+    Returns:
+        str: The comparable timestamp, or an empty string if it is invalid.
+    """
+    if isinstance(timestamp, str) and len(timestamp) >= 19 and timestamp[4] == "-" and timestamp[10] == "T":
+        return timestamp
+    try:
+        return datetime.fromisoformat(timestamp).isoformat()
+    except (ValueError, TypeError):
+        return ""
+
+@functools.lru_cache(maxsize=1024)
+def _formatted_dates(day):
+    """
+    Format a date the ways text date filters are matched against.
+    
+    Args:
+        day (date): The date to format.
+        
+    Returns:
+        tuple: The lowercased date formats.
+    """
+    return (
+        day.strftime("%B %d, %Y").lower(),  # e.g., "april 13, 2025"
+        day.strftime("%d %B %Y").lower(),  # e.g., "13 april 2025"
+        day.strftime("%Y-%m-%d").lower()  # e.g., "2025-04-13"
+    )
+
 class MemoryLayer:
     """Manages episodic and non-episodic memories."""
     
@@ -26,8 +110,36 @@ class MemoryLayer:
         self.non_episodic_dir = config.NON_EPISODIC_MEMORY_DIR
         
         # Ensure memory directories exist
-        os.makedirs(self.episodic_dir, exist_ok=True)
-        os.makedirs(self.non_episodic_dir, exist_ok=True)
+        ensure_directory(self.episodic_dir)
+        ensure_directory(self.non_episodic_dir)
+        
+        # Inverted index of hook -> memory file paths, used to narrow hook queries
+        # down to candidate files before loading them. Each file's timestamp,
+        # hook count and modification time are kept alongside, so pruning and
+        # recency queries don't need to load every file. Files are indexed when
+        # stored, or when a directory is synced after they appear or change
+        # on disk. The index is saved
+        # between runs so a new process doesn't have to load every file.
+        # The index and the batch state below are shared by every thread using
+        # this MemoryLayer (e.g. web requests and background memory updates),
+        # so they are only read and changed while holding _index_lock.
+        self._index_lock = threading.RLock()
+        self._hook_index = {}
+        self._indexed_hooks = {}
+        self._indexed_metadata = {}
+        self._hook_index_path = os.path.join(os.path.dirname(self.episodic_dir), HOOK_INDEX_FILENAME)
+        self._hook_index_dirty = False
+        self._load_hook_index()
+        
+        # Parsed memories and their file modification times by file path,
+        # most recently used last
+        self._memory_cache = OrderedDict()
+        self._memory_cache_size = getattr(config, "MEMORY_CACHE_SIZE", DEFAULT_MEMORY_CACHE_SIZE)
+        self._memory_cache_lock = threading.Lock()
+        
+        # Pruning deferred by batch_updates() until the batch completes
+        self._batch_depth = 0
+        self._pending_prunes = set()
         
         logger.info(f"MemoryLayer initialized with directories: {self.episodic_dir}, {self.non_episodic_dir}")
     
@@ -39,7 +151,7 @@ class MemoryLayer:
             memory_data (dict): The memory data to store.
             
         Returns:
-            str: The path to the stored memory file.
+            str: The path to the stored memory file, or None if it couldn't be saved.
         """
         # Generate a unique filename based on timestamp
         filename = generate_unique_filename("episodic")
@@ -53,11 +165,15 @@ class MemoryLayer:
         if "hooks" in memory_data:
             memory_data["hooks"] = [hook.lower().strip() for hook in memory_data["hooks"] if isinstance(hook, str)]
         
-        # Save the memory to a JSON file
-        save_to_json_file(memory_data, file_path)
+        # Save the memory to a JSON file, only indexing it if it was written
+        if not save_to_json_file(memory_data, file_path):
+            logger.error(f"Failed to store memory: {file_path}")
+            return None
+        self._cache_memory(file_path, memory_data)
+        self._index_memory(file_path, memory_data)
         
         # Prune old memories if necessary
-        self._prune_episodic_memories()
+        self._request_prune(self._prune_episodic_memories)
         
         logger.info(f"Stored episodic memory: {file_path}")
         return file_path
@@ -70,7 +186,7 @@ class MemoryLayer:
             memory_data (dict): The memory data to store.
             
         Returns:
-            str: The path to the stored memory file.
+            str: The path to the stored memory file, or None if it couldn't be saved.
         """
         # Check if memory_data has hooks
         if "hooks" not in memory_data or not memory_data["hooks"]:
@@ -80,24 +196,67 @@ class MemoryLayer:
         # FIXED: Ensure hooks are properly formatted
         memory_data["hooks"] = [hook.lower().strip() for hook in memory_data["hooks"] if isinstance(hook, str)]
         
+        # Use one "now" for both the filename and the timestamp
+        now = datetime.now()
+        
         # Generate a filename based on the first hook (for better organization)
         primary_hook = memory_data["hooks"][0].replace(" ", "_").lower()
-        filename = f"non_episodic_{primary_hook}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filename = f"non_episodic_{primary_hook}_{now.strftime('%Y%m%d_%H%M%S')}.json"
         file_path = os.path.join(self.non_episodic_dir, filename)
         
         # Add timestamp if not present
         if "timestamp" not in memory_data:
-            memory_data["timestamp"] = datetime.now().isoformat()
+            memory_data["timestamp"] = now.isoformat()
         
-        # Save the memory to a JSON file
-        save_to_json_file(memory_data, file_path)
+        # Save the memory to a JSON file, only indexing it if it was written
+        if not save_to_json_file(memory_data, file_path):
+            logger.error(f"Failed to store memory: {file_path}")
+            return None
+        self._cache_memory(file_path, memory_data)
+        self._index_memory(file_path, memory_data)
         
         # Prune if we exceed the maximum number of non-episodic memories
-        self._prune_non_episodic_memories()
+        self._request_prune(self._prune_non_episodic_memories)
         
         logger.info(f"Stored non-episodic memory: {file_path}")
         return file_path
     
+    @contextmanager
+    def batch_updates(self):
+        """
+        Defer pruning and saving the hook index until a batch of stores completes.
+        
+        Each store normally rescans its memory directory to prune it. Inside
+        this block each directory is pruned at most once, and the hook index
+        saved once, when the outermost batch exits.
+        """
+        with self._index_lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._index_lock:
+                try:
+                    if self._batch_depth == 1:
+                        # Still inside the batch here, so deletes made while pruning
+                        # don't each save the hook index
+                        while self._pending_prunes:
+                            self._pending_prunes.pop()()
+                        self._save_hook_index()
+                finally:
+                    self._batch_depth -= 1
+    
+    def _request_prune(self, prune):
+        """
+        Run a prune now, or defer it if a batch is in progress.
+        
+        Args:
+            prune (callable): The prune method to run.
+        """
+        with self.batch_updates():
+            with self._index_lock:
+                self._pending_prunes.add(prune)
+    
     def get_episodic_memories(self, hooks=None, max_count=None, date_filter=None):
         """
         Retrieve episodic memories, optionally filtered by hooks or date.
@@ -113,10 +272,37 @@ class MemoryLayer:
         memory_files = list_files_in_directory(self.episodic_dir, ".json")
         memories = []
         
+        # Resolve the date filter once for the whole query rather than per memory
+        date_range = self._resolve_date_filter(date_filter) if date_filter else None
+        
+        # Only load files whose hooks can match the query
+        if hooks:
+            normalized_hooks = {h.lower() for h in hooks if isinstance(h, str)}
+            self._sync_hook_index(self.episodic_dir, memory_files)
+            memory_files = self._filter_files_by_hooks(memory_files, normalized_hooks)
+        
+        # Drop files whose indexed timestamp is outside the date range before loading them
+        if date_range is not None:
+            if not hooks:
+                self._sync_hook_index(self.episodic_dir, memory_files)
+            memory_files = [path for path in memory_files if self._indexed_date_in_range(path, date_range)]
+        
+        # With a limit, visit files newest first by their indexed timestamps and
+        # stop once enough memories have passed the filters, instead of loading
+        # every file. Files that fail to load or are filtered out are simply
+        # skipped, so older matching memories still fill the result.
+        if max_count is not None:
+            if not hooks and date_range is None:
+                self._sync_hook_index(self.episodic_dir, memory_files)
+            memory_files = sorted(memory_files, key=self._indexed_timestamp, reverse=True)
+        
         # FIXED: Better error handling for file loading
         for file_path in memory_files:
+            if max_count is not None and len(memories) >= max_count:
+                break
+            
             try:
-                memory = load_from_json_file(file_path)
+                memory = self._load_memory(file_path)
                 if memory is None:
                     logger.warning(f"Failed to load memory from {file_path}")
                     continue
@@ -126,16 +312,15 @@ class MemoryLayer:
                 
                 # Apply hook filtering if specified
                 if hooks and "hooks" in memory:
-                    # FIXED: Normalize hooks for case-insensitive comparison
-                    memory_hooks = [h.lower() for h in memory["hooks"] if isinstance(h, str)]
-                    normalized_hooks = [h.lower() for h in hooks if isinstance(h, str)]
-                    
-                    if not any(h in memory_hooks for h in normalized_hooks):
+                    # FIXED: Normalize hooks for case-insensitive comparison. Files
+                    # not written by store_*_memory may have hooks in any case.
+                    memory_hooks = (h.lower() for h in memory["hooks"] if isinstance(h, str))
+                    if normalized_hooks.isdisjoint(memory_hooks):
                         continue
                 
                 # Apply date filtering if specified
                 if date_filter and "timestamp" in memory:
-                    if not self._match_date_filter(memory["timestamp"], date_filter):
+                    if not self._match_date_filter(memory["timestamp"], date_filter, date_range):
                         continue
                 
                 memories.append(memory)
@@ -143,12 +328,12 @@ class MemoryLayer:
                 logger.error(f"Error processing memory file {file_path}: {e}")
                 continue
         
-        # Sort by timestamp (most recent first)
-        memories.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        
-        # Limit the number of memories if specified
+        # Sort by timestamp (most recent first), keeping only the newest max_count
+        # when a limit is given instead of sorting everything and slicing
         if max_count is not None:
-            memories = memories[:max_count]
+            memories = heapq.nlargest(max_count, memories, key=lambda x: x.get("timestamp", ""))
+        else:
+            memories.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
         
         logger.debug(f"Retrieved {len(memories)} episodic memories")
         return memories
@@ -168,10 +353,30 @@ class MemoryLayer:
         memory_files = list_files_in_directory(self.non_episodic_dir, ".json")
         memories = []
         
+        # Resolve the date filter once for the whole query rather than per memory
+        date_range = self._resolve_date_filter(date_filter) if date_filter else None
+        
+        # Only load files whose hooks can match the query
+        if hooks:
+            normalized_hooks = {h.lower() for h in hooks if isinstance(h, str)}
+            self._sync_hook_index(self.non_episodic_dir, memory_files)
+            memory_files = self._filter_files_by_hooks(memory_files, normalized_hooks)
+        
+        # Drop files whose indexed timestamp is outside the date range before loading them
+        if date_range is not None:
+            if not hooks:
+                self._sync_hook_index(self.non_episodic_dir, memory_files)
+            memory_files = [path for path in memory_files if self._indexed_date_in_range(path, date_range)]
+        
         # FIXED: Better error handling for file loading
         for file_path in memory_files:
+            # Non-episodic memories are not sorted, so stop loading files
+            # once the requested number has been collected
+            if max_count is not None and len(memories) >= max_count:
+                break
+            
             try:
-                memory = load_from_json_file(file_path)
+                memory = self._load_memory(file_path)
                 if memory is None:
                     logger.warning(f"Failed to load memory from {file_path}")
                     continue
@@ -181,16 +386,15 @@ class MemoryLayer:
                 
                 # Apply hook filtering if specified
                 if hooks and "hooks" in memory:
-                    # FIXED: Normalize hooks for case-insensitive comparison
-                    memory_hooks = [h.lower() for h in memory["hooks"] if isinstance(h, str)]
-                    normalized_hooks = [h.lower() for h in hooks if isinstance(h, str)]
-                    
-                    if not any(h in memory_hooks for h in normalized_hooks):
+                    # FIXED: Normalize hooks for case-insensitive comparison. Files
+                    # not written by store_*_memory may have hooks in any case.
+                    memory_hooks = (h.lower() for h in memory["hooks"] if isinstance(h, str))
+                    if normalized_hooks.isdisjoint(memory_hooks):
                         continue
                 
                 # Apply date filtering if specified
                 if date_filter and "timestamp" in memory:
-                    if not self._match_date_filter(memory["timestamp"], date_filter):
+                    if not self._match_date_filter(memory["timestamp"], date_filter, date_range):
                         continue
                 
                 memories.append(memory)
@@ -198,81 +402,117 @@ class MemoryLayer:
                 logger.error(f"Error processing memory file {file_path}: {e}")
                 continue
         
-        # Limit the number of memories if specified
-        if max_count is not None:
-            memories = memories[:max_count]
-        
         logger.debug(f"Retrieved {len(memories)} non-episodic memories")
         return memories
     
-    def _match_date_filter(self, timestamp, date_filter):
+    def _resolve_date_filter(self, date_filter, today=None):
+        """
+        Resolve a date filter to the range of dates it covers.
+        
+        Args:
+            date_filter (str): The date filter string.
+            today (date, optional): The current date. Defaults to the current date.
+            
+        Returns:
+            tuple: (start_date, end_date), inclusive, or None if the filter is not
+                a recognized date or range and should be matched as text.
+        """
+        # FIXED: Enhanced date filtering with better patterns
+        date_filter = date_filter.lower()
+        
+        if today is None:
+            today = datetime.now().date()
+        
+        # Handle relative dates
+        if date_filter == "today":
+            return (today, today)
+        elif date_filter == "yesterday":
+            yesterday = today - timedelta(days=1)
+            return (yesterday, yesterday)
+        elif date_filter == "this week":
+            start_of_week = today - timedelta(days=today.weekday())
+            return (start_of_week, today)
+        elif date_filter == "last week":
+            end_of_last_week = today - timedelta(days=today.weekday() + 1)
+            start_of_last_week = end_of_last_week - timedelta(days=6)
+            return (start_of_last_week, end_of_last_week)
+        
+        # Handle specific dates (assuming YYYY-MM-DD format)
+        if ISO_DATE_PATTERN.match(date_filter):
+            try:
+                filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
+            except ValueError as e:
+                logger.error(f"Error parsing date filter {date_filter}: {e}")
+                # An empty range, so nothing matches
+                return (date.max, date.min)
+            return (filter_date, filter_date)
+        
+        # Handle full dates with the month written out
+        full_date_match = MONTH_DAY_YEAR_PATTERN.fullmatch(date_filter)
+        if full_date_match:
+            month_name, day, year = full_date_match.groups()
+        else:
+            full_date_match = DAY_MONTH_YEAR_PATTERN.fullmatch(date_filter)
+            if full_date_match:
+                day, month_name, year = full_date_match.groups()
+        if full_date_match and month_name in MONTHS:
+            try:
+                filter_date = date(int(year), MONTHS[month_name], int(day))
+            except ValueError as e:
+                logger.error(f"Error parsing date filter {date_filter}: {e}")
+                # An empty range, so nothing matches
+                return (date.max, date.min)
+            return (filter_date, filter_date)
+        
+        # Handle month and year formats
+        month_year_match = MONTH_YEAR_PATTERN.match(date_filter)
+        if month_year_match:
+            month_name, year = month_year_match.groups()
+            
+            if month_name in MONTHS and year.isdigit():
+                month, year = MONTHS[month_name], int(year)
+                last_day = calendar.monthrange(year, month)[1]
+                return (date(year, month, 1), date(year, month, last_day))
+        
+        # Text that can't be part of a formatted date matches nothing, so skip
+        # the per-memory text matching entirely
+        if not DATE_TEXT_PATTERN.fullmatch(date_filter):
+            return (date.max, date.min)
+        
+        return None
+    
+    def _match_date_filter(self, timestamp, date_filter, date_range=None):
         """
         Check if a timestamp matches a date filter.
         
         Args:
             timestamp (str): The ISO format timestamp.
             date_filter (str): The date filter string.
+            date_range (tuple, optional): The filter resolved by _resolve_date_filter,
+                so callers checking many timestamps can resolve it once. Defaults
+                to resolving date_filter.
             
         Returns:
             bool: True if the timestamp matches the filter, False otherwise.
         """
-        # FIXED: Enhanced date filtering with better patterns
         try:
-            # Convert timestamp to datetime
-            if isinstance(timestamp, str):
-                dt = datetime.fromisoformat(timestamp)
-            else:
+            if not isinstance(timestamp, str):
                 return False
             
-            # Handle common date formats
-            date_filter = date_filter.lower()
-            
-            # Handle relative dates
-            if date_filter == "today":
-                today = datetime.now().date()
-                return dt.date() == today
-            elif date_filter == "yesterday":
-                yesterday = (datetime.now() - timedelta(days=1)).date()
-                return dt.date() == yesterday
-            elif date_filter == "this week":
-                today = datetime.now().date()
-                start_of_week = today - timedelta(days=today.weekday())
-                return start_of_week <= dt.date() <= today
-            elif date_filter == "last week":
-                today = datetime.now().date()
-                end_of_last_week = today - timedelta(days=today.weekday() + 1)
-                start_of_last_week = end_of_last_week - timedelta(days=6)
-                return start_of_last_week <= dt.date() <= end_of_last_week
+            timestamp_date = _timestamp_date(timestamp)
+            if timestamp_date is None:
+                raise ValueError(f"Invalid isoformat string: {timestamp!r}")
             
-            # Handle specific dates (assuming YYYY-MM-DD format)
-            if re.match(r'\d{4}-\d{2}-\d{2}', date_filter):
-                filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-                return dt.date() == filter_date
+            if date_range is None:
+                date_range = self._resolve_date_filter(date_filter)
             
-            # Handle month and year formats
-            month_year_match = re.match(r'(\w+) (\d{4})', date_filter)
-            if month_year_match:
-                month_name, year = month_year_match.groups()
-                months = {
-                    "january": 1, "february": 2, "march": 3, "april": 4,
-                    "may": 5, "june": 6, "july": 7, "august": 8,
-                    "september": 9, "october": 10, "november": 11, "december": 12,
-                    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, 
-                    "jun": 6, "jul": 7, "aug": 8, "sep": 9, "oct": 10, 
-                    "nov": 11, "dec": 12
-                }
-                
-                if month_name in months and year.isdigit():
-                    return dt.month == months[month_name] and dt.year == int(year)
+            if date_range is not None:
+                start_date, end_date = date_range
+                return start_date <= timestamp_date <= end_date
             
             # If nothing matched, check if the date filter appears in the formatted date
-            formatted_date = dt.strftime("%B %d, %Y").lower()  # e.g., "april 13, 2025"
-            alternative_format = dt.strftime("%d %B %Y").lower()  # e.g., "13 april 2025"
-            iso_format = dt.strftime("%Y-%m-%d").lower()  # e.g., "2025-04-13"
-            
-            return (date_filter in formatted_date or 
-                    date_filter in alternative_format or 
-                    date_filter in iso_format)
+            date_filter = date_filter.lower()
+            return any(date_filter in formatted for formatted in _formatted_dates(timestamp_date))
             
         except Exception as e:
             logger.error(f"Error matching date filter {date_filter} with timestamp {timestamp}: {e}")
@@ -285,20 +525,299 @@ class MemoryLayer:
         Returns:
             list: A list of unique hooks.
         """
-        episodic_memories = self.get_episodic_memories()
-        non_episodic_memories = self.get_non_episodic_memories()
-        
-        # Collect all hooks
-        all_hooks = []
-        for memory in episodic_memories + non_episodic_memories:
-            if "hooks" in memory:
-                all_hooks.extend(memory["hooks"])
+        # The hook index already holds every memory's hooks, so only files it
+        # hasn't seen yet need to be loaded
+        for directory in (self.episodic_dir, self.non_episodic_dir):
+            self._sync_hook_index(directory, list_files_in_directory(directory, ".json"))
         
         # Return unique hooks
-        unique_hooks = list(set(all_hooks))
+        with self._index_lock:
+            unique_hooks = list(self._hook_index)
         logger.debug(f"Retrieved {len(unique_hooks)} unique hooks")
         return unique_hooks
     
+    def _load_memory(self, file_path):
+        """
+        Load a memory file, reusing the parsed copy if the file is unchanged.
+        
+        Cached copies are keyed on the file's modification time, so files
+        rewritten outside this MemoryLayer are parsed again.
+        
+        Args:
+            file_path (str): The path to the memory file.
+            
+        Returns:
+            dict: A copy of the memory data that the caller may modify, or None
+                if the file can't be loaded.
+        """
+        try:
+            mtime_ns = os.stat(file_path).st_mtime_ns
+        except OSError:
+            logger.debug(f"File does not exist: {file_path}")
+            self._uncache_memory(file_path)
+            return None
+        
+        with self._memory_cache_lock:
+            cached = self._memory_cache.get(file_path)
+            if cached is not None and cached[0] == mtime_ns:
+                self._memory_cache.move_to_end(file_path)
+                return dict(cached[1])
+        
+        memory = load_from_json_file(file_path)
+        if memory is None:
+            return None
+        
+        self._cache_memory(file_path, memory, mtime_ns)
+        return dict(memory)
+    
+    def _cache_memory(self, file_path, memory, mtime_ns=None):
+        """
+        Add a memory to the parsed-memory cache, evicting the least recently used.
+        
+        Args:
+            file_path (str): The path to the memory file.
+            memory (dict): The memory data.
+            mtime_ns (int, optional): The file's modification time the data was
+                read at. Defaults to the file's current modification time.
+        """
+        if mtime_ns is None:
+            try:
+                mtime_ns = os.stat(file_path).st_mtime_ns
+            except OSError:
+                # The file wasn't written, so there is nothing to cache
+                return
+        
+        with self._memory_cache_lock:
+            self._memory_cache[file_path] = (mtime_ns, dict(memory))
+            self._memory_cache.move_to_end(file_path)
+            while len(self._memory_cache) > self._memory_cache_size:
+                self._memory_cache.popitem(last=False)
+    
+    def _uncache_memory(self, file_path):
+        """
+        Remove a memory from the parsed-memory cache.
+        
+        Args:
+            file_path (str): The path to the memory file.
+        """
+        with self._memory_cache_lock:
+            self._memory_cache.pop(file_path, None)
+    
+    def _index_memory(self, file_path, memory, mtime_ns=None):
+        """
+        Add a memory to the hook index, replacing any entry the file already has.
+        
+        Args:
+            file_path (str): The path to the memory file.
+            memory (dict): The memory data.
+            mtime_ns (int, optional): The file's modification time the data was
+                read at. Defaults to the file's current modification time.
+        """
+        if mtime_ns is None:
+            try:
+                mtime_ns = os.stat(file_path).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+        
+        # Memories without hooks are never excluded by hook filtering
+        hooks = None
+        if "hooks" in memory:
+            hooks = {h.lower() for h in memory["hooks"] if isinstance(h, str)}
+        
+        timestamp = memory.get("timestamp", "")
+        if not isinstance(timestamp, str):
+            timestamp = ""
+        
+        self._add_index_entry(file_path, hooks, timestamp, len(memory.get("hooks", [])), mtime_ns)
+    
+    def _add_index_entry(self, file_path, hooks, timestamp, hook_count, mtime_ns):
+        """
+        Add a memory's entry to the hook index, replacing any entry it already has.
+        
+        Args:
+            file_path (str): The path to the memory file.
+            hooks (set): The memory's lowercased hooks, or None if it has none.
+            timestamp (str): The memory's timestamp, or an empty string.
+            hook_count (int): The number of hooks the memory has.
+            mtime_ns (int): The file's modification time when it was indexed,
+                or None if it isn't known.
+        """
+        with self._index_lock:
+            # A file can be rewritten with different hooks (e.g. two memories
+            # stored within the same second share a filename), so drop the old
+            # hooks before adding the new ones
+            self._unindex_memory(file_path)
+            self._hook_index_dirty = True
+            
+            for hook in hooks or ():
+                self._hook_index.setdefault(hook, set()).add(file_path)
+            self._indexed_hooks[file_path] = hooks
+            self._indexed_metadata[file_path] = (timestamp, hook_count, mtime_ns)
+    
+    def _unindex_memory(self, file_path):
+        """
+        Remove a memory from the hook index.
+        
+        Args:
+            file_path (str): The path to the memory file.
+        """
+        with self._index_lock:
+            if file_path not in self._indexed_hooks:
+                return
+            self._hook_index_dirty = True
+            
+            hooks = self._indexed_hooks.pop(file_path)
+            del self._indexed_metadata[file_path]
+            for hook in hooks or ():
+                paths = self._hook_index.get(hook)
+                if paths is not None:
+                    paths.discard(file_path)
+                    if not paths:
+                        del self._hook_index[hook]
+    
+    def _load_hook_index(self):
+        """
+        Load the hook index saved by a previous run, if there is one.
+        
+        Entries for files that have since changed on disk are corrected the
+        next time their directory is synced.
+        """
+        saved_index = load_from_json_file(self._hook_index_path)
+        if not isinstance(saved_index, dict):
+            return
+        
+        for file_path, entry in saved_index.items():
+            # Entries in an older format are skipped and rebuilt from the file
+            if not isinstance(entry, dict):
+                continue
+            hooks = entry.get("hooks")
+            self._add_index_entry(
+                file_path,
+                None if hooks is None else set(hooks),
+                entry.get("timestamp", ""),
+                entry.get("hook_count", 0),
+                entry.get("mtime_ns")
+            )
+        self._hook_index_dirty = False
+        logger.debug(f"Loaded hook index with {len(saved_index)} memories")
+    
+    def _save_hook_index(self):
+        """Save the hook index if it has changed since it was last saved or loaded."""
+        # The snapshot is taken, and written, under the lock, so the index
+        # can't change while it is copied and an older snapshot can never
+        # overwrite a newer one
+        with self._index_lock:
+            if not self._hook_index_dirty:
+                return
+            
+            saved_index = {}
+            for file_path, hooks in self._indexed_hooks.items():
+                timestamp, hook_count, mtime_ns = self._indexed_metadata[file_path]
+                saved_index[file_path] = {
+                    "hooks": None if hooks is None else sorted(hooks),
+                    "timestamp": timestamp,
+                    "hook_count": hook_count,
+                    "mtime_ns": mtime_ns
+                }
+            save_to_json_file(saved_index, self._hook_index_path)
+            self._hook_index_dirty = False
+    
+    def _request_hook_index_save(self):
+        """Save the hook index now, or leave it to the batch in progress."""
+        with self._index_lock:
+            if not self._batch_depth:
+                self._save_hook_index()
+    
+    def _sync_hook_index(self, directory, memory_files):
+        """
+        Bring the hook index up to date with the files in a memory directory.
+        
+        Files not yet in the index (e.g. written by another process), or changed
+        since they were indexed, are loaded and indexed, and indexed files that
+        no longer exist are dropped.
+        
+        Args:
+            directory (str): The memory directory.
+            memory_files (list): The memory file paths currently in the directory.
+        """
+        with self._index_lock:
+            for file_path in memory_files:
+                try:
+                    mtime_ns = os.stat(file_path).st_mtime_ns
+                except OSError:
+                    continue
+                metadata = self._indexed_metadata.get(file_path)
+                if metadata is None or metadata[2] != mtime_ns:
+                    memory = self._load_memory(file_path)
+                    if memory is not None:
+                        self._index_memory(file_path, memory, mtime_ns)
+            
+            # memory_files lists subdirectories too, so compare against
+            # everything under the directory rather than just its own files
+            present = set(memory_files)
+            directory_prefix = os.path.join(directory, "")
+            for file_path in list(self._indexed_hooks):
+                if file_path.startswith(directory_prefix) and file_path not in present:
+                    self._unindex_memory(file_path)
+            
+            self._request_hook_index_save()
+    
+    def _indexed_timestamp(self, file_path):
+        """
+        Get a memory's timestamp from the index.
+        
+        Args:
+            file_path (str): The path to the memory file.
+            
+        Returns:
+            str: The indexed timestamp, or an empty string if there is none.
+        """
+        metadata = self._indexed_metadata.get(file_path)
+        return metadata[0] if metadata is not None else ""
+    
+    def _indexed_date_in_range(self, file_path, date_range):
+        """
+        Check whether a memory's indexed timestamp may fall within a date range.
+        
+        Memories without an indexed timestamp are kept, so the full date check
+        can decide once they are loaded.
+        
+        Args:
+            file_path (str): The path to the memory file.
+            date_range (tuple): The inclusive (start_date, end_date) range.
+            
+        Returns:
+            bool: False only if the memory is known to be outside the range.
+        """
+        timestamp = self._indexed_timestamp(file_path)
+        if not timestamp:
+            return True
+        timestamp_date = _timestamp_date(timestamp)
+        if timestamp_date is None:
+            return True
+        return date_range[0] <= timestamp_date <= date_range[1]
+    
+    def _filter_files_by_hooks(self, memory_files, normalized_hooks):
+        """
+        Narrow a list of memory files down to those that may match any of the hooks.
+        
+        Args:
+            memory_files (list): The memory file paths, already synced into the index.
+            normalized_hooks (set): The lowercased hooks to filter by.
+            
+        Returns:
+            list: The candidate file paths, in their original order.
+        """
+        with self._index_lock:
+            candidates = set()
+            for hook in normalized_hooks:
+                candidates.update(self._hook_index.get(hook, ()))
+            
+            return [
+                file_path for file_path in memory_files
+                if file_path in candidates or (file_path in self._indexed_hooks and self._indexed_hooks[file_path] is None)
+            ]
+    
     def delete_memory(self, file_path):
         """
         Delete a memory file.
@@ -310,13 +829,19 @@ class MemoryLayer:
             bool: True if the memory was deleted successfully, False otherwise.
         """
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Deleted memory: {file_path}")
-                return True
-            else:
-                logger.warning(f"Memory file does not exist: {file_path}")
-                return False
+            # Remove directly rather than checking for the file first
+            os.remove(file_path)
+            self._uncache_memory(file_path)
+            self._unindex_memory(file_path)
+            self._request_hook_index_save()
+            logger.info(f"Deleted memory: {file_path}")
+            return True
+        except FileNotFoundError:
+            self._uncache_memory(file_path)
+            self._unindex_memory(file_path)
+            self._request_hook_index_save()
+            logger.warning(f"Memory file does not exist: {file_path}")
+            return False
         except Exception as e:
             logger.error(f"Error deleting memory {file_path}: {e}")
             return False
@@ -331,36 +856,35 @@ class MemoryLayer:
         if len(memory_files) <= config.MAX_EPISODIC_MEMORIES:
             return
         
-        memories = []
+        # Timestamps come from the index, so files are only loaded if unindexed
+        self._sync_hook_index(self.episodic_dir, memory_files)
+        
+        # Heap of (comparable timestamp, file path), so the oldest pops first.
+        # Comparing timestamp strings against a cutoff computed once avoids
+        # parsing every memory's timestamp to work out its age.
+        memory_ages = []
+        retention_cutoff = (datetime.now() - timedelta(days=config.MEMORY_RETENTION_DAYS)).isoformat()
         for file_path in memory_files:
-            memory = load_from_json_file(file_path)
-            if memory is None:
+            metadata = self._indexed_metadata.get(file_path)
+            if metadata is None:
                 continue
             
-            # Add the file path for reference
-            memory["file_path"] = file_path
-            
-            # Calculate the age of the memory in days
-            if "timestamp" in memory:
-                days_old = get_days_since_timestamp(memory["timestamp"])
-                memory["days_old"] = days_old
-            else:
-                memory["days_old"] = float('inf')  # Very old if no timestamp
-            
-            memories.append(memory)
-        
-        # Sort by age (oldest first)
-        memories.sort(key=lambda x: x.get("days_old", float('inf')), reverse=True)
-        
-        # Delete memories that are too old or exceed the maximum count
-        for memory in memories:
-            # Delete if too old
-            if memory.get("days_old", 0) > config.MEMORY_RETENTION_DAYS:
-                self.delete_memory(memory["file_path"])
-            # Delete if we still have too many memories
-            elif len(memories) > config.MAX_EPISODIC_MEMORIES:
-                self.delete_memory(memory["file_path"])
-                memories.remove(memory)
+            # Memories without a valid timestamp sort first, as the oldest
+            memory_ages.append((_sortable_timestamp(metadata[0]), file_path))
+        
+        # Only the memories being deleted need to come out in age order, so pop
+        # them off a heap instead of sorting every memory
+        heapq.heapify(memory_ages)
+        
+        # Delete memories that are too old or exceed the maximum count, tracking
+        # how many remain rather than removing each one from the list
+        remaining_count = len(memory_ages)
+        while memory_ages:
+            timestamp, file_path = heapq.heappop(memory_ages)
+            # Delete if too old, or if we still have too many memories
+            if timestamp < retention_cutoff or remaining_count > config.MAX_EPISODIC_MEMORIES:
+                self.delete_memory(file_path)
+                remaining_count -= 1
             else:
                 # We've pruned enough
                 break
@@ -376,26 +900,22 @@ class MemoryLayer:
         if len(memory_files) <= config.MAX_NON_EPISODIC_MEMORIES:
             return
         
-        memories = []
+        # Hook counts come from the index, so files are only loaded if unindexed
+        self._sync_hook_index(self.non_episodic_dir, memory_files)
+        
+        # Count the number of hooks of each memory
+        hook_counts = []
         for file_path in memory_files:
-            memory = load_from_json_file(file_path)
-            if memory is None:
+            metadata = self._indexed_metadata.get(file_path)
+            if metadata is None:
                 continue
             
-            # Add the file path for reference
-            memory["file_path"] = file_path
-            
-            # Count the number of hooks
-            hook_count = len(memory.get("hooks", []))
-            memory["hook_count"] = hook_count
-            
-            memories.append(memory)
+            hook_counts.append((metadata[1], file_path))
         
-        # Sort by hook count (fewest first)
-        memories.sort(key=lambda x: x.get("hook_count", 0))
-        
-        # Delete memories until we're under the limit
-        excess_count = len(memories) - config.MAX_NON_EPISODIC_MEMORIES
-        for i in range(excess_count):
-            if i < len(memories):
-                self.delete_memory(memories[i]["file_path"])
\ No newline at end of file
+        # Delete the memories with the fewest hooks until we're under the limit,
+        # selecting just those rather than sorting every memory
+        excess_count = len(hook_counts) - config.MAX_NON_EPISODIC_MEMORIES
+        if excess_count <= 0:
+            return
+        for hook_count, file_path in heapq.nsmallest(excess_count, hook_counts):
+            self.delete_memory(file_path)
\ No newline at end of file
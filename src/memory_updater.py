@@ -3,14 +3,95 @@ Updates memories based on new interactions.
 """
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import config
 from src.hook_generator import HookGenerator
 from src.summarizer import Summarizer
-from src.claude_client import create_claude_client
+from src.claude_client import create_claude_client, get_response_text
+from src.response_generator import REASONING_PREFIX_PATTERN, SENTENCE_BREAKS
+from src.utils import parse_json_array
 
 logger = logging.getLogger(__name__)
 
+# Non-episodic extraction instructions. They are identical on every call, so they
+# are formatted once and sent ahead of the interaction being analyzed.
+EXTRACTION_INSTRUCTIONS_TEMPLATE = """
+        Please analyze the following interaction and extract any potential non-episodic memories.
+        Non-episodic memories are facts, observations, or general knowledge that might be useful to remember for future interactions.
+        
+        For example, from "User: My favorite color is blue. Assistant: That's great! Blue is a calming color.", 
+        you might extract "User's favorite color is blue" as a non-episodic memory.
+        
+        Please extract 0-3 non-episodic memories from this interaction. Only extract memories if they represent concrete, useful facts.
+        For each memory, also give up to {max_hooks} hooks for indexing and retrieval: one to three word phrases
+        that capture its key entities, concepts, or themes.
+        Return your response as a JSON array of objects, each with a "memory" string and a "hooks" array of strings.
+        Example: [{{"memory": "User's name is John", "hooks": ["user name", "john"]}}, {{"memory": "User is allergic to peanuts", "hooks": ["peanut allergy", "food allergies"]}}]
+        
+        If there are no clear non-episodic memories to extract, return an empty array: []
+        """
+
+# Entity extraction scans capitalized words together with the sentence ends and
+# line breaks around them, so proper nouns, names and capitalized words all
+# come from a single pass over the text
+ENTITY_TOKEN_PATTERN = re.compile(r'(?P<word>\b[A-Z][a-z]+\b)|(?P<end>[.!?])|[\n\r]')
+
+# Simple fact patterns, as (compiled pattern, whether the fact is in the first person)
+SIMPLE_FACT_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), pattern.startswith(r'I\s+'))
+    for pattern in (
+        # Pattern for "User/I prefer/like/love/hate/enjoy X"
+        r'User(?:\'s|\s+)(?:preferred|favorite|likes|loves|hates|enjoys|dislikes)\s+([^.!?]+)',
+        r'I\s+(?:prefer|like|love|hate|enjoy|dislike)\s+([^.!?]+)',
+        # Pattern for "User/I am/is X" (attributes/properties)
+        r'User\s+(?:is|was|has been|has|had|will be)\s+([^.!?]+)',
+        r'I\s+(?:am|was|have been|have|had|will be)\s+([^.!?]+)',
+        # Pattern for "User/My name is X"
+        r'(?:User|My)\s+name\s+is\s+([^.!?]+)',
+        r'I\s+am\s+([^.!?]{2,30})',  # Short phrases that might be names
+        # Pattern for locations
+        r'(?:User|I)\s+(?:live|lives|work|works|study|studies)\s+in\s+([^.!?]+)',
+        r'(?:User|I)\s+(?:am|is)\s+from\s+([^.!?]+)',
+        r'(?:User|I)\s+(?:visited|traveled|went|traveled)\s+to\s+([^.!?]+)'
+    )
+)
+
+# Categorical hooks, as (category, pattern matching any of its keywords). The
+# keywords match anywhere in the lowercased text, so each category takes one
+# regex search rather than a substring scan per keyword.
+CATEGORY_PATTERNS = tuple(
+    (category, re.compile("|".join(re.escape(keyword) for keyword in keywords)))
+    for category, keywords in (
+        ("personal", ["my", "i am", "i'm", "my name", "myself", "i have", "i've"]),
+        ("question", ["what", "how", "why", "when", "where", "who", "can you", "could you"]),
+        ("preference", ["like", "prefer", "favorite", "enjoy", "love", "hate", "dislike"]),
+        ("food", ["eat", "food", "dish", "meal", "recipe", "cook", "bake", "restaurant"]),
+        ("technology", ["computer", "software", "hardware", "app", "device", "phone", "laptop", "code"]),
+        ("opinion", ["think", "believe", "opinion", "perspective", "view", "consider"]),
+        ("place", ["city", "country", "location", "visit", "travel", "place", "region", "area"])
+    )
+)
+
+# Interactions shorter than this are small talk too brief to hold facts worth an API call
+MIN_EXTRACTION_TEXT_LENGTH = 120
+# Sentences of the user's message, with their closing punctuation
+SENTENCE_PATTERN = re.compile(r'[^.!?\n]+[.!?]*')
+# A sentence that is purely a question, opening with a question word or an
+# inverted auxiliary verb; statements with a tag question ("I love pizza, do
+# you?") don't match, since they open with the statement
+PURE_QUESTION_PATTERN = re.compile(
+    r"\s*(?:what|who|whom|whose|where|when|why|how|which|is|are|was|were|am|"
+    r"do|does|did|can|could|will|would|should|shall|may|might|have|has|had)\b[^.!?]*\?+\s*",
+    re.IGNORECASE
+)
+
+# Claude calls made while building an interaction's memories that run concurrently:
+# the episodic summary and the non-episodic extraction
+MEMORY_UPDATE_WORKERS = 2
+# Interactions whose episodic memories are built at once by update_batch
+BATCH_PREPARE_WORKERS = 8
+
 class MemoryUpdater:
     """Updates memories based on new interactions."""
     
@@ -25,7 +106,15 @@ class MemoryUpdater:
         self.hook_generator = HookGenerator()
         self.summarizer = Summarizer()
         self.client = create_claude_client()
-        self.model = config.CLAUDE_MODEL
+        # Use the faster model for fact extraction, which is a shallow task, to reduce costs and improve speed
+        self.model = config.CLAUDE_FAST_MODEL
+        self.extraction_instructions_block = {
+            "type": "text",
+            "text": EXTRACTION_INSTRUCTIONS_TEMPLATE.format(max_hooks=self.hook_generator.max_hooks)
+        }
+        # The Claude calls for one interaction are independent and I/O bound,
+        # so they run concurrently instead of one after another
+        self.executor = ThreadPoolExecutor(max_workers=MEMORY_UPDATE_WORKERS, thread_name_prefix="memory-extraction")
         logger.info(f"MemoryUpdater initialized with model: {self.model}")
     
     def update(self, user_input, response, conversation_id=None):
@@ -47,9 +136,13 @@ class MemoryUpdater:
             logger.warning("Empty or invalid user input or response, skipping memory update")
             return (None, [])
         
+        # Read the clock once, for the conversation ID and every memory's timestamp
+        now = datetime.now()
+        timestamp = now.isoformat()
+        
         # Generate a unique conversation ID if not provided
         if conversation_id is None:
-            conversation_id = datetime.now().strftime("%Y%m%d%H%M%S")
+            conversation_id = now.strftime("%Y%m%d%H%M%S")
         
         # FIXED: Clean up responses that might contain internal reasoning
         # Look for patterns that indicate internal reasoning in AI responses
@@ -58,13 +151,124 @@ class MemoryUpdater:
         # Create the full interaction text
         interaction_text = f"User: {user_input}\n\nAssistant: {cleaned_response}"
         
+        # Create the memories before storing them, so pruning can run once
+        # for the whole interaction instead of after every store.
+        # Extract potential non-episodic memories while the episodic memory is built
+        non_episodic_future = self.executor.submit(self._extract_non_episodic_memories, interaction_text, timestamp)
+        episodic_memory = self._create_episodic_memory(interaction_text, conversation_id, timestamp)
+        non_episodic_memories = non_episodic_future.result()
+        
+        with self.memory_layer.batch_updates():
+            episodic_memory_path, non_episodic_memory_paths = self._store_memories(episodic_memory, non_episodic_memories)
+        
+        logger.info(f"Updated memories: episodic={episodic_memory_path}, non_episodic={len(non_episodic_memory_paths)}")
+        return (episodic_memory_path, non_episodic_memory_paths)
+    
+    def update_batch(self, interactions):
+        """
+        Update memories based on several interactions, e.g. when importing a conversation history.
+        
+        The non-episodic extraction calls for all interactions are sent as one
+        Message Batches API request, which costs half as much as individual
+        calls but can take minutes to complete, so this is meant for bulk
+        ingestion rather than live conversations. Nothing in the app calls it;
+        it is provided for scripts that import conversations through the API.
+        
+        Args:
+            interactions (list): (user_input, response, conversation_id) tuples;
+                conversation_id may be None.
+            
+        Returns:
+            list: (episodic_memory_path, non_episodic_memory_paths) tuples, one per interaction.
+        """
+        logger.debug(f"Updating memories for a batch of {len(interactions)} interactions")
+        
+        # Building the episodic memories makes summary and hook calls for each
+        # interaction, so several interactions are prepared at once
+        with ThreadPoolExecutor(max_workers=BATCH_PREPARE_WORKERS, thread_name_prefix="memory-batch") as pool:
+            prepared = list(pool.map(self._prepare_interaction, interactions))
+        
+        extraction_requests = []
+        for i, entry in enumerate(prepared):
+            if entry is None:
+                continue
+            episodic_memory, simple_memories, extraction_request, timestamp = entry
+            if extraction_request is not None:
+                prepared[i] = (episodic_memory, simple_memories, len(extraction_requests), timestamp)
+                extraction_requests.append(extraction_request)
+        
+        try:
+            extraction_responses = self.client.messages_batch(extraction_requests)
+        except Exception as e:
+            logger.error(f"Error extracting non-episodic memories: {e}")
+            extraction_responses = [None] * len(extraction_requests)
+        
+        results = []
+        with self.memory_layer.batch_updates():
+            for entry in prepared:
+                if entry is None:
+                    results.append((None, []))
+                    continue
+                
+                episodic_memory, non_episodic_memories, request_index, timestamp = entry
+                extraction_response = None if request_index is None else extraction_responses[request_index]
+                if extraction_response is not None:
+                    try:
+                        non_episodic_memories = self._memories_from_extraction(get_response_text(extraction_response), non_episodic_memories, timestamp)
+                    except Exception as e:
+                        logger.error(f"Error extracting non-episodic memories: {e}")
+                
+                results.append(self._store_memories(episodic_memory, non_episodic_memories))
+        
+        logger.info(f"Updated memories for {len(results)} interactions")
+        return results
+    
+    def _prepare_interaction(self, interaction):
+        """
+        Build an interaction's memories, short of the Claude extraction call, for update_batch.
+        
+        Args:
+            interaction (tuple): (user_input, response, conversation_id); conversation_id may be None.
+            
+        Returns:
+            tuple: (episodic_memory, simple_memories, extraction_request, timestamp), where
+                extraction_request is None if no extraction call is needed; or None if the
+                interaction is invalid.
+        """
+        user_input, response, conversation_id = interaction
+        if not user_input or not response:
+            logger.warning("Empty or invalid user input or response, skipping memory update")
+            return None
+        
+        now = datetime.now()
+        timestamp = now.isoformat()
+        if conversation_id is None:
+            conversation_id = now.strftime("%Y%m%d%H%M%S")
+        
+        interaction_text = f"User: {user_input}\n\nAssistant: {self._clean_response(response)}"
+        episodic_memory = self._create_episodic_memory(interaction_text, conversation_id, timestamp)
+        simple_memories = self._extract_simple_memories(interaction_text, timestamp)
+        
+        # Pattern matching found enough facts, or there are none to find, so no API call is needed
+        if len(simple_memories) >= 3 or not self._needs_extraction(interaction_text):
+            return (episodic_memory, simple_memories[:3], None, timestamp)
+        
+        return (episodic_memory, simple_memories, self._extraction_request(interaction_text), timestamp)
+    
+    def _store_memories(self, episodic_memory, non_episodic_memories):
+        """
+        Store the memories created from one interaction.
+        
+        Args:
+            episodic_memory (dict): The episodic memory.
+            non_episodic_memories (list): The non-episodic memories.
+            
+        Returns:
+            tuple: (episodic_memory_path, non_episodic_memory_paths) - Paths to the stored memories.
+        """
         # Store episodic memory
-        episodic_memory = self._create_episodic_memory(interaction_text, conversation_id)
         episodic_memory_path = self.memory_layer.store_episodic_memory(episodic_memory)
         
-        # Extract potential non-episodic memories
-        non_episodic_memories = self._extract_non_episodic_memories(interaction_text)
-        
         # Store non-episodic memories
         non_episodic_memory_paths = []
         for memory in non_episodic_memories:
@@ -72,7 +276,6 @@ class MemoryUpdater:
             if path:
                 non_episodic_memory_paths.append(path)
         
-        logger.info(f"Updated memories: episodic={episodic_memory_path}, non_episodic={len(non_episodic_memory_paths)}")
         return (episodic_memory_path, non_episodic_memory_paths)
     
     def _clean_response(self, response):
@@ -85,60 +288,50 @@ class MemoryUpdater:
         Returns:
             str: The cleaned response.
         """
-        # Check for patterns that might indicate internal reasoning
-        patterns_to_check = [
-            "I'll acknowledge", "Let me acknowledge", "I'll respond", 
-            "I should", "I'm going to", "I will now", "Let me provide",
-            "I'll give", "I need to", "I notice that", "I should respond",
-            "My response should"
-        ]
-        
-        cleaned_response = response
-        
-        # Check if response starts with any of these patterns
-        for pattern in patterns_to_check:
-            if response.startswith(pattern):
-                # Try to find where the actual response begins (often in quotes)
-                quote_start = response.find('"')
-                quote_end = response.rfind('"')
-                
-                if quote_start != -1 and quote_end != -1 and quote_end > quote_start:
-                    # Extract the content within quotes
-                    direct_response = response[quote_start+1:quote_end].strip()
-                    cleaned_response = direct_response
-                    logger.debug(f"Cleaned internal reasoning from response")
-                    break
-                
-                # Alternative: look for a clear sentence break
-                sentence_breaks = ['. ', '! ', '? ']
-                for break_char in sentence_breaks:
-                    first_break = response.find(break_char)
-                    if first_break != -1:
-                        # Skip the first sentence which might be internal reasoning
-                        potential_direct = response[first_break+2:].strip()
-                        if len(potential_direct) > 20:  # Ensure we're not cutting too much
-                            cleaned_response = potential_direct
-                            logger.debug(f"Cleaned internal reasoning from response using sentence break")
-                            break
-        
-        return cleaned_response
+        # Check if response starts with any of the patterns that might indicate internal reasoning
+        match = REASONING_PREFIX_PATTERN.match(response)
+        if not match:
+            return response
+        
+        # Try to find where the actual response begins (often in quotes)
+        quote_start = response.find('"', match.end())
+        quote_end = response.rfind('"')
+        
+        if quote_start != -1 and quote_end > quote_start:
+            # Extract the content within quotes
+            logger.debug(f"Cleaned internal reasoning from response")
+            return response[quote_start+1:quote_end].strip()
+        
+        # Alternative: look for a clear sentence break
+        for break_char in SENTENCE_BREAKS:
+            first_break = response.find(break_char, match.end())
+            if first_break != -1:
+                # Skip the first sentence which might be internal reasoning
+                potential_direct = response[first_break+2:].strip()
+                if len(potential_direct) > 20:  # Ensure we're not cutting too much
+                    logger.debug(f"Cleaned internal reasoning from response using sentence break")
+                    return potential_direct
+        
+        return response
     
-    def _create_episodic_memory(self, interaction_text, conversation_id):
+    def _create_episodic_memory(self, interaction_text, conversation_id, timestamp):
         """
         Create an episodic memory from an interaction.
         
         Args:
             interaction_text (str): The interaction text.
             conversation_id (str): A unique identifier for the conversation.
+            timestamp (str): The ISO format timestamp of the interaction.
             
         Returns:
             dict: An episodic memory.
         """
-        # Generate a summary of the interaction
-        summary = self.summarizer.summarize(interaction_text)
+        # Generate a summary of the interaction, while hooks are generated
+        summary_future = self.executor.submit(self.summarizer.summarize, interaction_text)
         
         # Generate hooks for retrieval
         hooks = self.hook_generator.generate_hooks(interaction_text)
+        summary = summary_future.result()
         
         # FIXED: Extract potential entities (names, places, etc.) for better retrieval
         entities = self._extract_entities(interaction_text)
@@ -147,28 +340,18 @@ class MemoryUpdater:
         
         # FIXED: Add basic categorical hooks
         interaction_lower = interaction_text.lower()
-        categories = [
-            ("personal", ["my", "i am", "i'm", "my name", "myself", "i have", "i've"]),
-            ("question", ["what", "how", "why", "when", "where", "who", "can you", "could you"]),
-            ("preference", ["like", "prefer", "favorite", "enjoy", "love", "hate", "dislike"]),
-            ("food", ["eat", "food", "dish", "meal", "recipe", "cook", "bake", "restaurant"]),
-            ("technology", ["computer", "software", "hardware", "app", "device", "phone", "laptop", "code"]),
-            ("opinion", ["think", "believe", "opinion", "perspective", "view", "consider"]),
-            ("place", ["city", "country", "location", "visit", "travel", "place", "region", "area"])
-        ]
-        
-        for category, keywords in categories:
-            if any(keyword in interaction_lower for keyword in keywords):
+        for category, pattern in CATEGORY_PATTERNS:
+            if pattern.search(interaction_lower):
                 hooks.append(category)
         
-        # Get unique hooks
-        hooks = list(set(hooks))
+        # Get unique hooks, keeping their order
+        hooks = list(dict.fromkeys(hooks))
         
         # Create the episodic memory
         episodic_memory = {
             "type": "episodic",
             "conversation_id": conversation_id,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "content": interaction_text,
             "summary": summary,
             "hooks": hooks
@@ -188,28 +371,108 @@ class MemoryUpdater:
         """
         # Simple regex-based entity extraction
         # This is a very simplified approach; you might want to use an NLP library
+        entities = {}
+        
+        # Whether a sentence break or line break has been passed since the last capitalized word
+        after_break = False
+        # Start and end of the current run of capitalized words separated only by whitespace
+        run_start = run_end = -1
+        run_length = 0
+        
+        for match in ENTITY_TOKEN_PATTERN.finditer(text):
+            word = match.group("word")
+            if word is None:
+                # A sentence end only counts as a break when followed by whitespace
+                end = match.end()
+                after_break = match.group("end") is None or (end < len(text) and text[end].isspace())
+                continue
+            
+            start = match.start()
+            # Find potential proper nouns (the first capitalized word after a break)
+            if after_break:
+                entities[word.lower()] = None
+                after_break = False
+            
+            # Find words that appear to be names (two or more consecutive capitalized words)
+            if run_length and text[run_end:start].isspace():
+                run_length += 1
+            else:
+                if run_length > 1:
+                    entities[text[run_start:run_end].lower()] = None
+                run_start = start
+                run_length = 1
+            run_end = match.end()
+            
+            # Find any capitalized words (potential names, places, etc.)
+            if len(word) > 2:
+                entities[word.lower()] = None
         
-        # Find potential proper nouns (capitalized words not at the start of sentences)
-        proper_nouns = re.findall(r'(?<=[.!?]\s|\n|\r)[^.!?]*?\b([A-Z][a-z]+)\b', text)
+        if run_length > 1:
+            entities[text[run_start:run_end].lower()] = None
         
-        # Find words that appear to be names (two consecutive capitalized words)
-        names = re.findall(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\b', text)
+        return list(entities)
+    
+    def _extract_non_episodic_memories(self, interaction_text, timestamp):
+        """
+        Extract non-episodic memories from an interaction.
         
-        # Find any capitalized words (potential names, places, etc.)
-        capitalized = re.findall(r'\b([A-Z][a-z]{2,})\b', text)
+        Args:
+            interaction_text (str): The interaction text.
+            timestamp (str): The ISO format timestamp of the interaction.
+            
+        Returns:
+            list: A list of non-episodic memories.
+        """
+        simple_memories = self._extract_simple_memories(interaction_text, timestamp)
+        
+        # If we found simple facts, we can skip the API call to save costs
+        if len(simple_memories) >= 3:
+            logger.debug(f"Extracted {len(simple_memories)} non-episodic memories using pattern matching")
+            return simple_memories[:3]  # Limit to 3 memories
         
-        # Combine and filter duplicates
-        all_entities = proper_nouns + names + capitalized
-        unique_entities = list(set([entity.lower() for entity in all_entities]))
+        # Skip the API call for small talk and questions, which carry no new facts
+        if not self._needs_extraction(interaction_text):
+            logger.debug("Interaction has no statements about the user, skipping extraction call")
+            return simple_memories
         
-        return unique_entities
+        try:
+            # Use the client wrapper
+            response = self.client.messages_create(**self._extraction_request(interaction_text))
+            
+            # Extract the text from the response
+            return self._memories_from_extraction(get_response_text(response), simple_memories, timestamp)
+            
+        except Exception as e:
+            logger.error(f"Error extracting non-episodic memories: {e}")
+            # Return simple memories as a fallback
+            return simple_memories
     
-    def _extract_non_episodic_memories(self, interaction_text):
+    def _needs_extraction(self, interaction_text):
         """
-        Extract non-episodic memories from an interaction.
+        Check whether an interaction could hold facts worth a Claude extraction call.
+        
+        Args:
+            interaction_text (str): The interaction text.
+            
+        Returns:
+            bool: False for short small talk, or if the user only asked questions.
+        """
+        if len(interaction_text) < MIN_EXTRACTION_TEXT_LENGTH:
+            return False
+        
+        # A user message made up only of questions introduces no facts to remember
+        user_text = interaction_text.partition("\n\nAssistant: ")[0]
+        if user_text.startswith("User: "):
+            user_text = user_text[len("User: "):]
+        return not all(PURE_QUESTION_PATTERN.fullmatch(sentence) for sentence in SENTENCE_PATTERN.findall(user_text))
+    
+    def _extract_simple_memories(self, interaction_text, timestamp):
+        """
+        Create non-episodic memories from facts found by pattern matching.
         
         Args:
             interaction_text (str): The interaction text.
+            timestamp (str): The ISO format timestamp of the interaction.
             
         Returns:
             list: A list of non-episodic memories.
@@ -218,115 +481,128 @@ class MemoryUpdater:
         simple_facts = self._extract_simple_facts(interaction_text)
         simple_memories = []
         
-        for fact in simple_facts:
-            # Generate hooks for retrieval
-            hooks = self.hook_generator.generate_hooks(fact)
-            
+        # Generate hooks for retrieval, for all facts at once
+        fact_hooks = self.hook_generator.generate_hooks_batch(simple_facts)
+        
+        for fact, hooks in zip(simple_facts, fact_hooks):
             # Create the non-episodic memory
             non_episodic_memory = {
                 "type": "non_episodic",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "content": fact,
                 "hooks": hooks
             }
             
             simple_memories.append(non_episodic_memory)
         
-        # If we found simple facts, we can skip the API call to save costs
-        if len(simple_memories) >= 3:
-            logger.debug(f"Extracted {len(simple_memories)} non-episodic memories using pattern matching")
-            return simple_memories[:3]  # Limit to 3 memories
+        return simple_memories
+    
+    def _extraction_request(self, interaction_text):
+        """
+        Build the Claude request for extracting non-episodic memories.
         
+        Args:
+            interaction_text (str): The interaction text.
+            
+        Returns:
+            dict: Keyword arguments for the client wrapper.
+        """
         # Use Claude to extract potential non-episodic memories (facts, observations, etc.)
+        # Only this part of the prompt changes between calls
         extraction_prompt = f"""
-        Please analyze the following interaction and extract any potential non-episodic memories.
-        Non-episodic memories are facts, observations, or general knowledge that might be useful to remember for future interactions.
-        
-        For example, from "User: My favorite color is blue. Assistant: That's great! Blue is a calming color.", 
-        you might extract "User's favorite color is blue" as a non-episodic memory.
-        
         Interaction:
         {interaction_text}
+        """
         
-        Please extract 0-3 non-episodic memories from this interaction. Only extract memories if they represent concrete, useful facts.
-        Return your response as a JSON array of strings, with each string being a potential memory.
-        Example: ["User's name is John", "User is allergic to peanuts", "User works as a software developer"]
-        
-        If there are no clear non-episodic memories to extract, return an empty array: []
+        return {
+            "model": self.model,
+            "max_tokens": 1024,
+            "temperature": 0.3,
+            "messages": [
+                {"role": "user", "content": [self.extraction_instructions_block, {"type": "text", "text": extraction_prompt}]}
+            ]
+        }
+    
+    def _memories_from_extraction(self, response_text, simple_memories, timestamp):
         """
+        Create non-episodic memories from a Claude extraction response.
         
-        try:
-            # Use the client wrapper
-            response = self.client.messages_create(
-                model=self.model,
-                max_tokens=1024,
-                temperature=0.3,
-                messages=[
-                    {"role": "user", "content": extraction_prompt}
-                ]
-            )
-            
-            # Extract the text from the response
-            if hasattr(response, 'content') and isinstance(response.content, list) and len(response.content) > 0:
-                if isinstance(response.content[0], dict) and 'text' in response.content[0]:
-                    response_text = response.content[0]['text'].strip()
-                elif hasattr(response.content[0], 'text'):
-                    response_text = response.content[0].text.strip()
-                else:
-                    response_text = str(response.content[0]).strip()
-            else:
-                response_text = str(response).strip()
-            
-            # Extract the JSON array from the response
-            import json
-            import re
-            
-            # Find JSON array in the response
-            array_match = re.search(r'\[(.*?)\]', response_text, re.DOTALL)
-            if array_match:
-                try:
-                    # Try to parse the matched array
-                    memories_json = f"[{array_match.group(1)}]"
-                    memory_texts = json.loads(memories_json)
-                    
-                    # Create non-episodic memory objects
-                    non_episodic_memories = []
-                    for memory_text in memory_texts:
-                        if isinstance(memory_text, str) and memory_text.strip():
-                            # Generate hooks for retrieval
-                            hooks = self.hook_generator.generate_hooks(memory_text)
-                            
-                            # Create the non-episodic memory
-                            non_episodic_memory = {
-                                "type": "non_episodic",
-                                "timestamp": datetime.now().isoformat(),
-                                "content": memory_text,
-                                "hooks": hooks
-                            }
-                            
-                            non_episodic_memories.append(non_episodic_memory)
-                    
-                    # Combine with simple memories found through pattern matching
-                    combined_memories = non_episodic_memories + simple_memories
-                    
-                    # Limit to a reasonable number
-                    result_memories = combined_memories[:3]
-                    
-                    logger.debug(f"Extracted {len(result_memories)} non-episodic memories")
-                    return result_memories
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, return simple memories as fallback
-                    logger.warning("Failed to parse non-episodic memories, using pattern-matched facts")
-                    return simple_memories
+        Args:
+            response_text (str): The extraction response text.
+            simple_memories (list): Memories already found by pattern matching.
+            timestamp (str): The ISO format timestamp of the interaction.
             
+        Returns:
+            list: A list of non-episodic memories.
+        """
+        # Extract the JSON array from the response
+        extracted = parse_json_array(response_text)
+        if extracted is None:
             # If no array was found, return simple memories as fallback
             logger.warning("No non-episodic memories found in API response, using pattern-matched facts")
             return simple_memories
+        
+        memory_texts, memory_hooks = self._parse_extracted_memories(extracted)
+        
+        # Hooks normally come back with the memories; only generate them
+        # separately for memories that arrived without any
+        missing = [i for i, hooks in enumerate(memory_hooks) if not hooks]
+        if missing:
+            generated_hooks = self.hook_generator.generate_hooks_batch([memory_texts[i] for i in missing])
+            for i, hooks in zip(missing, generated_hooks):
+                memory_hooks[i] = hooks
+        
+        # Create non-episodic memory objects
+        non_episodic_memories = []
+        for memory_text, hooks in zip(memory_texts, memory_hooks):
+            # Create the non-episodic memory
+            non_episodic_memory = {
+                "type": "non_episodic",
+                "timestamp": timestamp,
+                "content": memory_text,
+                "hooks": hooks
+            }
             
-        except Exception as e:
-            logger.error(f"Error extracting non-episodic memories: {e}")
-            # Return simple memories as a fallback
-            return simple_memories
+            non_episodic_memories.append(non_episodic_memory)
+        
+        # Combine with simple memories found through pattern matching
+        combined_memories = non_episodic_memories + simple_memories
+        
+        # Limit to a reasonable number
+        result_memories = combined_memories[:3]
+        
+        logger.debug(f"Extracted {len(result_memories)} non-episodic memories")
+        return result_memories
+    
+    def _parse_extracted_memories(self, extracted):
+        """
+        Read memory texts and their hooks from a parsed extraction response.
+        
+        Args:
+            extracted (list): The parsed JSON array, of {"memory", "hooks"} objects
+                or plain memory strings.
+            
+        Returns:
+            tuple: (memory_texts, memory_hooks) - Parallel lists; memories without
+                usable hooks get an empty hook list.
+        """
+        memory_texts = []
+        memory_hooks = []
+        for item in extracted:
+            hooks = []
+            if isinstance(item, dict):
+                raw_hooks = item.get("hooks")
+                if isinstance(raw_hooks, list):
+                    hooks = [hook.strip() for hook in raw_hooks if isinstance(hook, str) and hook.strip()]
+                item = item.get("memory")
+            
+            if not isinstance(item, str) or not item.strip():
+                continue
+            
+            memory_texts.append(item)
+            memory_hooks.append(list(dict.fromkeys(hooks))[:self.hook_generator.max_hooks])
+        
+        return memory_texts, memory_hooks
     
     def _extract_simple_facts(self, text):
         """
@@ -340,42 +616,15 @@ class MemoryUpdater:
         """
         facts = []
         
-        # Pattern for "User/I prefer/like/love/hate/enjoy X"
-        preference_patterns = [
-            r'User(?:\'s|\s+)(?:preferred|favorite|likes|loves|hates|enjoys|dislikes)\s+([^.!?]+)',
-            r'I\s+(?:prefer|like|love|hate|enjoy|dislike)\s+([^.!?]+)'
-        ]
-        
-        # Pattern for "User/I am/is X" (attributes/properties)
-        attribute_patterns = [
-            r'User\s+(?:is|was|has been|has|had|will be)\s+([^.!?]+)',
-            r'I\s+(?:am|was|have been|have|had|will be)\s+([^.!?]+)'
-        ]
-        
-        # Pattern for "User/My name is X"
-        name_patterns = [
-            r'(?:User|My)\s+name\s+is\s+([^.!?]+)',
-            r'I\s+am\s+([^.!?]{2,30})'  # Short phrases that might be names
-        ]
-        
-        # Pattern for locations
-        location_patterns = [
-            r'(?:User|I)\s+(?:live|lives|work|works|study|studies)\s+in\s+([^.!?]+)',
-            r'(?:User|I)\s+(?:am|is)\s+from\s+([^.!?]+)',
-            r'(?:User|I)\s+(?:visited|traveled|went|traveled)\s+to\s+([^.!?]+)'
-        ]
-        
         # Extract facts using the patterns
-        for pattern_list in [preference_patterns, attribute_patterns, name_patterns, location_patterns]:
-            for pattern in pattern_list:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    # Clean and format the fact
-                    fact = match.strip()
-                    if len(fact) > 5:  # Ignore very short matches
-                        # Convert to third person if it starts with "I"
-                        if pattern.startswith(r'I\s+'):
-                            fact = "User " + fact[2:]
-                        facts.append(fact)
+        for pattern, first_person in SIMPLE_FACT_PATTERNS:
+            for match in pattern.finditer(text):
+                # Clean and format the fact
+                fact = match.group(1).strip()
+                if len(fact) > 5:  # Ignore very short matches
+                    # Convert to third person if it starts with "I"
+                    if first_person:
+                        fact = "User " + fact[2:]
+                    facts.append(fact)
         
         return facts
\ No newline at end of file
@@ -5,11 +5,32 @@ import logging
 import re
 from datetime import datetime
 import config
-from src.claude_client import create_claude_client
-from src.utils import extract_dates_from_text
+from src.claude_client import create_claude_client, get_response_text
+from src.utils import extract_dates_from_text, parse_json_object
 
 logger = logging.getLogger(__name__)
 
+# Metadata extraction instructions. They never change between calls, so they
+# are built once and sent ahead of the text being analyzed.
+METADATA_INSTRUCTIONS = """
+        Please analyze the following text and extract:
+        1. Keywords: Important nouns, verbs, and adjectives (max 10)
+        2. Semantic themes: High-level topics or concepts present in the text (max 5)
+        3. Sentiment: The overall emotional tone (positive, negative, neutral, or mixed)
+        
+        Format your response as a JSON object with keys: "keywords", "themes", and "sentiment".
+        """
+METADATA_INSTRUCTIONS_BLOCK = {"type": "text", "text": METADATA_INSTRUCTIONS}
+
+# Fallback patterns for reading metadata fields out of a non-JSON response,
+# as (field name, pattern, whether the value is a comma/newline separated list)
+TEXT_FIELD_PATTERNS = (
+    ("keywords", re.compile(r"keywords[:\s]+(.*?)(?=themes|\n\n|$)", re.IGNORECASE | re.DOTALL), True),
+    ("themes", re.compile(r"themes[:\s]+(.*?)(?=sentiment|\n\n|$)", re.IGNORECASE | re.DOTALL), True),
+    ("sentiment", re.compile(r"sentiment[:\s]+(.*?)(?=\n\n|$)", re.IGNORECASE), False)
+)
+LIST_SEPARATOR_PATTERN = re.compile(r'[,\n]')
+
 class MetadataExtractor:
     """Extracts metadata from text using Claude and regex patterns."""
     
@@ -43,90 +64,81 @@ class MetadataExtractor:
         # Extract dates using regex
         dates = extract_dates_from_text(text)
         
-        # Use Claude to extract keywords, themes, and sentiment
-        prompt = f"""
-        Please analyze the following text and extract:
-        1. Keywords: Important nouns, verbs, and adjectives (max 10)
-        2. Semantic themes: High-level topics or concepts present in the text (max 5)
-        3. Sentiment: The overall emotional tone (positive, negative, neutral, or mixed)
-        
-        Format your response as a JSON object with keys: "keywords", "themes", and "sentiment".
-        
-        Text: {text}
-        """
-        
         try:
             # Use the client wrapper
-            response = self.client.messages_create(
-                model=self.model,
-                max_tokens=1024,
-                temperature=0.3,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            response = self.client.messages_create(**self._build_request(text))
             
             # Extract the text from the response
-            if hasattr(response, 'content') and isinstance(response.content, list) and len(response.content) > 0:
-                if isinstance(response.content[0], dict) and 'text' in response.content[0]:
-                    response_text = response.content[0]['text'].strip()
-                elif hasattr(response.content[0], 'text'):
-                    response_text = response.content[0].text.strip()
-                else:
-                    response_text = str(response.content[0]).strip()
-            else:
-                response_text = str(response).strip()
+            return self._parse_response(get_response_text(response), dates)
             
-            # Simple extraction of JSON from the response text
-            # In a real implementation, you might want to use a more robust method
-            # or have Claude return a more structured format
-            json_start = response_text.find("{")
-            json_end = response_text.rfind("}") + 1
+        except Exception as e:
+            logger.error(f"Error extracting metadata: {e}")
+            # Return empty metadata as a fallback
+            return {"keywords": [], "dates": dates, "themes": [], "sentiment": "neutral"}
+    
+    def _build_request(self, text):
+        """
+        Build the Claude request for extracting keywords, themes, and sentiment.
+        
+        Args:
+            text (str): The text to extract metadata from.
             
-            if json_start != -1 and json_end != -1:
-                import json
-                try:
-                    extracted_data = json.loads(response_text[json_start:json_end])
-                except json.JSONDecodeError:
-                    # Fallback if JSON parsing fails
-                    extracted_data = {
-                        "keywords": [],
-                        "themes": [],
-                        "sentiment": "neutral"
-                    }
-            else:
-                # Fallback if JSON parsing fails
-                extracted_data = {
-                    "keywords": [],
-                    "themes": [],
-                    "sentiment": "neutral"
-                }
-                
-                # Try to extract data from text if JSON fails
-                if "keywords" in response_text.lower():
-                    keywords_match = re.search(r"keywords[:\s]+(.*?)(?=themes|\n\n|$)", response_text, re.IGNORECASE | re.DOTALL)
-                    if keywords_match:
-                        keywords_text = keywords_match.group(1).strip()
-                        extracted_data["keywords"] = [k.strip() for k in re.split(r'[,\n]', keywords_text) if k.strip()]
-                
-                if "themes" in response_text.lower():
-                    themes_match = re.search(r"themes[:\s]+(.*?)(?=sentiment|\n\n|$)", response_text, re.IGNORECASE | re.DOTALL)
-                    if themes_match:
-                        themes_text = themes_match.group(1).strip()
-                        extracted_data["themes"] = [t.strip() for t in re.split(r'[,\n]', themes_text) if t.strip()]
-                
-                if "sentiment" in response_text.lower():
-                    sentiment_match = re.search(r"sentiment[:\s]+(.*?)(?=\n\n|$)", response_text, re.IGNORECASE)
-                    if sentiment_match:
-                        extracted_data["sentiment"] = sentiment_match.group(1).strip().lower()
+        Returns:
+            dict: Keyword arguments for the client wrapper.
+        """
+        # Use Claude to extract keywords, themes, and sentiment
+        # Only this part of the prompt changes between calls
+        prompt = f"""
+        Text: {text}
+        """
+        
+        return {
+            "model": self.model,
+            "max_tokens": 1024,
+            "temperature": 0.3,
+            "messages": [
+                {"role": "user", "content": [METADATA_INSTRUCTIONS_BLOCK, {"type": "text", "text": prompt}]}
+            ]
+        }
+    
+    def _parse_response(self, response_text, dates):
+        """
+        Read the extracted metadata out of a Claude response.
+        
+        Args:
+            response_text (str): The response text.
+            dates (list): The dates found in the text by regex.
             
-            # Add dates to the extracted data
-            extracted_data["dates"] = dates
+        Returns:
+            dict: The extracted metadata, as returned by extract.
+        """
+        # Extract the JSON object from the response text
+        extracted_data = parse_json_object(response_text)
+        
+        if extracted_data is None:
+            # Fallback if JSON parsing fails
+            extracted_data = {
+                "keywords": [],
+                "themes": [],
+                "sentiment": "neutral"
+            }
             
+            # Try to extract data from text if JSON fails
+            lower_response_text = response_text.lower()
+            for key, pattern, is_list in TEXT_FIELD_PATTERNS:
+                if key not in lower_response_text:
+                    continue
+                match = pattern.search(response_text)
+                if match:
+                    value = match.group(1).strip()
+                    if is_list:
+                        extracted_data[key] = [v.strip() for v in LIST_SEPARATOR_PATTERN.split(value) if v.strip()]
+                    else:
+                        extracted_data[key] = value.lower()
+        
+        # Add dates to the extracted data
+        extracted_data["dates"] = dates
+        
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Extracted metadata: {extracted_data}")
-            return extracted_data
-            
-        except Exception as e:
-            logger.error(f"Error extracting metadata: {e}")
-            # Return empty metadata as a fallback
-            return {"keywords": [], "dates": dates, "themes": [], "sentiment": "neutral"}
\ No newline at end of file
+        return extracted_data
@@ -3,12 +3,34 @@ Handler for user prompts.
 """
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from src.summarizer import Summarizer
 from src.metadata_extractor import MetadataExtractor
 
 logger = logging.getLogger(__name__)
 
+# Patterns checked against every prompt, compiled once
+# Words and phrases marking a memory-related query, matched anywhere in the
+# lowercased prompt with one search instead of one substring scan per keyword
+MEMORY_KEYWORDS = (
+    "remember", "recall", "memory", "forget", "remembered",
+    "mentioned", "said", "told", "talked about", "discussed",
+    "previous", "earlier", "before", "last time"
+)
+MEMORY_KEYWORD_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in MEMORY_KEYWORDS))
+# A date the prompt asks about, e.g. "on April 13, 2025" or "on 2025-04-13"
+DATE_QUERY_PATTERN = re.compile(r'\b(?:on|at|in|during)\s+(\w+\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}|\d{4}-\d{2}-\d{2})\b', re.IGNORECASE)
+# "What did we talk about" style questions about past conversations
+TALK_ABOUT_PATTERN = re.compile(
+    "|".join((
+        r'what did (?:we|you|I) (?:talk|discuss|say|mention) about',
+        r'what (?:was|were) (?:we|you|I) (?:talking|discussing|saying|mentioning) about',
+        r'what have (?:we|you|I) (?:talked|discussed|said|mentioned) about'
+    )),
+    re.IGNORECASE
+)
+
 class PromptHandler:
     """Handles user prompts and extracts relevant information."""
     
@@ -16,6 +38,9 @@ class PromptHandler:
         """Initialize the PromptHandler."""
         self.summarizer = Summarizer()
         self.metadata_extractor = MetadataExtractor()
+        # Summarization and metadata extraction are independent Claude calls,
+        # so they are dispatched together instead of one after the other
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prompt-handler")
         logger.info("PromptHandler initialized")
     
     def process(self, prompt):
@@ -44,52 +69,36 @@ class PromptHandler:
                 "timestamp": datetime.now().isoformat()
             }
         
-        # Create a summary of the prompt
-        summary = self.summarizer.summarize(prompt)
-        
-        # Extract metadata from the prompt
-        metadata = self.metadata_extractor.extract(prompt)
+        # Create a summary of the prompt and extract its metadata concurrently
+        summary_future = self.executor.submit(self.summarizer.summarize, prompt)
+        metadata_future = self.executor.submit(self.metadata_extractor.extract, prompt)
+        summary = summary_future.result()
+        metadata = metadata_future.result()
         
         # FIXED: Enhance metadata with additional preprocessing
         # Detect if this is a memory-related query
-        memory_keywords = ["remember", "recall", "memory", "forget", "remembered", 
-                          "mentioned", "said", "told", "talked about", "discussed",
-                          "previous", "earlier", "before", "last time"]
-        
-        is_memory_query = False
-        for keyword in memory_keywords:
-            if keyword in prompt.lower():
-                is_memory_query = True
-                # Add memory-related keywords if not already present
-                if "keywords" in metadata and "memory" not in metadata["keywords"]:
-                    metadata["keywords"].append("memory")
-                if "keywords" in metadata and "recall" not in metadata["keywords"]:
-                    metadata["keywords"].append("recall")
-                break
+        is_memory_query = MEMORY_KEYWORD_PATTERN.search(prompt.lower()) is not None
+        if is_memory_query:
+            # Add memory-related keywords if not already present
+            if "keywords" in metadata and "memory" not in metadata["keywords"]:
+                metadata["keywords"].append("memory")
+            if "keywords" in metadata and "recall" not in metadata["keywords"]:
+                metadata["keywords"].append("recall")
         
         # FIXED: Detect if this is a date-specific query
-        date_pattern = r'\b(?:on|at|in|during)\s+(\w+\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}|\d{4}-\d{2}-\d{2})\b'
-        date_match = re.search(date_pattern, prompt, re.IGNORECASE)
+        date_match = DATE_QUERY_PATTERN.search(prompt)
         if date_match:
             date_str = date_match.group(1)
             if "dates" in metadata and date_str not in metadata["dates"]:
                 metadata["dates"].append(date_str)
         
         # FIXED: Add additional processing for "what did we talk about" queries
-        talk_about_patterns = [
-            r'what did (?:we|you|I) (?:talk|discuss|say|mention) about',
-            r'what (?:was|were) (?:we|you|I) (?:talking|discussing|saying|mentioning) about',
-            r'what have (?:we|you|I) (?:talked|discussed|said|mentioned) about'
-        ]
-        
-        for pattern in talk_about_patterns:
-            if re.search(pattern, prompt, re.IGNORECASE):
-                # This is definitely a memory-related query
-                if "keywords" in metadata and "conversation history" not in metadata["keywords"]:
-                    metadata["keywords"].append("conversation history")
-                if "themes" in metadata and "past conversations" not in metadata["themes"]:
-                    metadata["themes"].append("past conversations")
-                break
+        if TALK_ABOUT_PATTERN.search(prompt):
+            # This is definitely a memory-related query
+            if "keywords" in metadata and "conversation history" not in metadata["keywords"]:
+                metadata["keywords"].append("conversation history")
+            if "themes" in metadata and "past conversations" not in metadata["themes"]:
+                metadata["themes"].append("past conversations")
                 
         # Create a timestamp for the prompt
         timestamp = datetime.now().isoformat()
@@ -103,5 +112,6 @@ class PromptHandler:
             "is_memory_query": is_memory_query
         }
         
-        logger.debug(f"Processed prompt: {processed_prompt}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Processed prompt: {processed_prompt}")
         return processed_prompt
\ No newline at end of file
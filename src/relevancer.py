@@ -1,16 +1,105 @@
 """
 Retrieval engine for finding relevant memories.
 """
+import functools
 import logging
 import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import config
 from src.hook_generator import HookGenerator
-from src.claude_client import create_claude_client
-from src.utils import extract_dates_from_text
+from src.claude_client import create_claude_client, get_response_text
+from src.utils import extract_dates_from_text, parse_json_array
 
 logger = logging.getLogger(__name__)
 
+# Phrases that mark a prompt as asking about past conversations, matched
+# with a single compiled pattern instead of one substring scan per phrase
+TIME_RELATED_PHRASES = (
+    "yesterday", "last week", "last time", "previously", "before",
+    "earlier", "last month", "remember", "recall", "mentioned",
+    "talked about", "discussed", "said", "told", "asked"
+)
+TIME_RELATED_PATTERN = re.compile("|".join(re.escape(phrase) for phrase in TIME_RELATED_PHRASES))
+
+# Ranking instructions. They never change between calls, so they are built once
+# and sent ahead of the prompt and memories being ranked.
+RANKING_INSTRUCTIONS = """
+        I need to find memories that are most relevant to the prompt below.
+        
+        Please rank the memories that follow it by their relevance to the prompt.
+        Consider:
+        1. Direct relevance to the subject matter or question
+        2. Temporal relevance (if the prompt asks about a specific time)
+        3. Semantic connections between the prompt and memory content
+        
+        Return ONLY a JSON array of memory indices in order of relevance (most relevant first).
+        Example: [3, 1, 5, 2, 4]
+        """
+RANKING_INSTRUCTIONS_BLOCK = {"type": "text", "text": RANKING_INSTRUCTIONS}
+
+# Explicit dates in a date reference: "April 13, 2025", "13 April 2025" or ISO YYYY-MM-DD
+EXPLICIT_DATE_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r'(\w+)\s+(\d{1,2})(?:,?\s+|\s*,\s*)(\d{4})',
+        r'(\d{1,2})(?:\s+|\s*\w{2}\s+)(\w+)(?:,?\s+|\s*,\s*)(\d{4})',
+        r'(\d{4})-(\d{2})-(\d{2})'
+    )
+)
+
+# Questions about a specific date, with the date as the first group
+DATE_QUERY_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'(?:what|when|how).{1,20}(?:on|at).{1,10}(\w+ \d{1,2},? \d{4})',
+        r'(?:what|when|how).{1,20}(?:on|at).{1,10}(\d{1,2} \w+ \d{4})',
+        r'(?:what|when|how).{1,20}(?:on|at).{1,10}(\d{4}-\d{2}-\d{2})',
+        r'(?:on|at) (\w+ \d{1,2},? \d{4})',
+        r'(?:on|at) (\d{1,2} \w+ \d{4})',
+        r'(?:on|at) (\d{4}-\d{2}-\d{2})'
+    )
+)
+
+# Relative time expressions, as (pattern, the date reference they stand for)
+RELATIVE_TIME_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), value)
+    for pattern, value in (
+        (r'yesterday', 'yesterday'),
+        (r'last week', 'last week'),
+        (r'last month', 'last month'),
+        (r'today', 'today'),
+        (r'this morning', 'today'),
+        (r'this afternoon', 'today'),
+        (r'this evening', 'today')
+    )
+)
+
+# Fallback for reading ranked indices out of a response that isn't valid JSON
+BRACKETED_TEXT_PATTERN = re.compile(r'\[(.*?)\]', re.DOTALL)
+NUMBER_PATTERN = re.compile(r'\d+')
+
+# Number of rankings kept for prompts that retrieve the same memories again
+DEFAULT_RANKING_CACHE_SIZE = 128
+
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp(timestamp):
+    """
+    Format a memory timestamp for the ranking prompt, caching repeated timestamps.
+    
+    Args:
+        timestamp (str): The ISO format timestamp.
+        
+    Returns:
+        str: The timestamp as "YYYY-MM-DD HH:MM", or unchanged if it can't be parsed.
+    """
+    # Format timestamp for better readability if possible
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%Y-%m-%d %H:%M")
+    except (ValueError, TypeError):
+        return timestamp
+
 class Relevancer:
     """Retrieves relevant memories based on user input."""
     
@@ -27,6 +116,11 @@ class Relevancer:
         # Use standard model for ranking, which requires reasoning
         self.model = config.CLAUDE_MODEL
         self.max_memories = config.MAX_MEMORIES_TO_RETRIEVE
+        # Ranked indices keyed by the prompt and the memories as sent to Claude,
+        # so repeated queries over unchanged memories skip the ranking call
+        self._ranking_cache = OrderedDict()
+        self._ranking_cache_size = getattr(config, "RANKING_CACHE_SIZE", DEFAULT_RANKING_CACHE_SIZE)
+        self._ranking_cache_lock = threading.Lock()
         logger.info(f"Relevancer initialized with model: {self.model}")
     
     def retrieve(self, processed_prompt):
@@ -39,7 +133,8 @@ class Relevancer:
         Returns:
             list: A list of relevant memories.
         """
-        logger.debug(f"Retrieving memories for prompt: {processed_prompt}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Retrieving memories for prompt: {processed_prompt}")
         
         # Extract information from the processed prompt
         prompt_text = processed_prompt.get("original_prompt", "")
@@ -52,13 +147,6 @@ class Relevancer:
             # If no dates in metadata, try extracting from the prompt directly
             date_references = extract_dates_from_text(prompt_text)
         
-        # FIXED: Add special handling for date-based queries about past conversations
-        time_related_phrases = [
-            "yesterday", "last week", "last time", "previously", "before",
-            "earlier", "last month", "remember", "recall", "mentioned",
-            "talked about", "discussed", "said", "told", "asked"
-        ]
-        
         time_query = False
         date_query = False
         specific_date = None
@@ -78,17 +166,8 @@ class Relevancer:
                     else:
                         # Try to parse explicit dates
                         # This is a simplified approach, you might need more robust date parsing
-                        date_patterns = [
-                            # Match patterns like "April 13, 2025" or "April 13 2025"
-                            r'(\w+)\s+(\d{1,2})(?:,?\s+|\s*,\s*)(\d{4})',
-                            # Match patterns like "13 April 2025"
-                            r'(\d{1,2})(?:\s+|\s*\w{2}\s+)(\w+)(?:,?\s+|\s*,\s*)(\d{4})',
-                            # Match ISO format YYYY-MM-DD
-                            r'(\d{4})-(\d{2})-(\d{2})'
-                        ]
-                        
-                        for pattern in date_patterns:
-                            match = re.search(pattern, date_ref)
+                        for pattern in EXPLICIT_DATE_PATTERNS:
+                            match = pattern.search(date_ref)
                             if match:
                                 specific_date = date_ref
                                 break
@@ -96,11 +175,9 @@ class Relevancer:
                     logger.warning(f"Error parsing date {date_ref}: {e}")
                     continue
         
-        # Check for time-related phrases
-        for phrase in time_related_phrases:
-            if phrase in lower_prompt:
-                time_query = True
-                break
+        # FIXED: Add special handling for date-based queries about past conversations
+        if TIME_RELATED_PATTERN.search(lower_prompt):
+            time_query = True
         
         # Generate hooks from the prompt
         hooks = self.hook_generator.generate_hooks(prompt_text)
@@ -121,22 +198,18 @@ class Relevancer:
             if specific_date:
                 hooks.append(specific_date)
         
-        # Get unique hooks
-        hooks = list(set(hooks))
+        # Get unique hooks, keeping their order
+        hooks = list(dict.fromkeys(hooks))
         
         # FIXED: Directly search memory by date if this is a query about a specific date
         date_filtered_memories = []
         if specific_date:
-            # Get all memories
-            all_episodic = self.memory_layer.get_episodic_memories()
-            all_non_episodic = self.memory_layer.get_non_episodic_memories()
-            all_memories = all_episodic + all_non_episodic
-            
-            for memory in all_memories:
-                # Check if memory timestamp contains the specific date
-                memory_timestamp = memory.get("timestamp", "")
-                if specific_date in memory_timestamp:
-                    date_filtered_memories.append(memory)
+            # The memory layer resolves the date and checks it against the indexed
+            # timestamps, so only memories from that date are loaded
+            date_filtered_memories = (
+                self.memory_layer.get_episodic_memories(date_filter=specific_date)
+                + self.memory_layer.get_non_episodic_memories(date_filter=specific_date)
+            )
             
             # If we found memories for the specific date, prioritize them
             if date_filtered_memories:
@@ -195,41 +268,35 @@ class Relevancer:
         # FIXED: Improved memory preparation for ranking
         memory_summaries = []
         for i, memory in enumerate(memories):
-            content = memory.get("content", "")
-            summary = memory.get("summary", "")
-            timestamp = memory.get("timestamp", "")
+            formatted_time = _format_timestamp(memory.get("timestamp", ""))
             
-            # Format timestamp for better readability if possible
-            try:
-                dt = datetime.fromisoformat(timestamp)
-                formatted_time = dt.strftime("%Y-%m-%d %H:%M")
-            except (ValueError, TypeError):
-                formatted_time = timestamp
-                
-            memory_text = summary if summary else content
+            # Use summary if available, otherwise use content
+            memory_text = memory.get("summary") or memory.get("content", "")
             memory_summaries.append(f"Memory {i+1} (from {formatted_time}): {memory_text}")
         
         # Join memory summaries into a single text
         memories_text = "\n\n".join(memory_summaries)
         
+        # The memories text includes each memory's time and content, so a
+        # changed or different memory set never matches a cached ranking
+        cache_key = (prompt_text, memories_text)
+        with self._ranking_cache_lock:
+            cached_indices = self._ranking_cache.get(cache_key)
+            if cached_indices is not None:
+                self._ranking_cache.move_to_end(cache_key)
+                logger.debug("Using cached memory ranking")
+                return self._order_memories_by_indices(memories, cached_indices)
+        
         # FIXED: Enhanced ranking prompt for better relevance determination
+        # Only this part of the prompt changes between calls
         ranking_prompt = f"""
-        I need to find memories that are most relevant to the following prompt:
+        Prompt:
         
         "{prompt_text}"
         
         Here are the available memories:
         
         {memories_text}
-        
-        Please rank these memories by their relevance to the prompt.
-        Consider:
-        1. Direct relevance to the subject matter or question
-        2. Temporal relevance (if the prompt asks about a specific time)
-        3. Semantic connections between the prompt and memory content
-        
-        Return ONLY a JSON array of memory indices in order of relevance (most relevant first).
-        Example: [3, 1, 5, 2, 4]
         """
         
         try:
@@ -239,70 +306,33 @@ class Relevancer:
                 max_tokens=1024,
                 temperature=0.2,  # Lower temperature for more deterministic ranking
                 messages=[
-                    {"role": "user", "content": ranking_prompt}
+                    {"role": "user", "content": [RANKING_INSTRUCTIONS_BLOCK, {"type": "text", "text": ranking_prompt}]}
                 ]
             )
             
             # Extract the text from the response
-            if hasattr(response, 'content') and isinstance(response.content, list) and len(response.content) > 0:
-                if isinstance(response.content[0], dict) and 'text' in response.content[0]:
-                    response_text = response.content[0]['text'].strip()
-                elif hasattr(response.content[0], 'text'):
-                    response_text = response.content[0].text.strip()
-                else:
-                    response_text = str(response.content[0]).strip()
-            else:
-                response_text = str(response).strip()
+            response_text = get_response_text(response)
             
             # Extract the JSON array from the response
-            import json
-            import re
+            indices = parse_json_array(response_text)
+            if indices is not None:
+                self._cache_ranking(cache_key, indices)
+                # Reorder memories based on the indices
+                return self._order_memories_by_indices(memories, indices)
             
-            # Find JSON array in the response
-            array_match = re.search(r'\[(.*?)\]', response_text, re.DOTALL)
+            # Find a bracketed list in the response that isn't valid JSON
+            array_match = BRACKETED_TEXT_PATTERN.search(response_text)
             if array_match:
-                try:
-                    # Try to parse the matched array
-                    indices_json = f"[{array_match.group(1)}]"
-                    indices = json.loads(indices_json)
-                    
-                    # Convert 1-based indices to 0-based indices and filter out invalid indices
-                    valid_indices = [idx - 1 for idx in indices if isinstance(idx, int) and 1 <= idx <= len(memories)]
-                    
-                    # Reorder memories based on the indices
-                    ranked_memories = [memories[idx] for idx in valid_indices if idx < len(memories)]
-                    
-                    # Add any memories that weren't ranked (as a fallback)
-                    ranked_indices_set = set(valid_indices)
-                    for i in range(len(memories)):
-                        if i not in ranked_indices_set:
-                            ranked_memories.append(memories[i])
-                    
-                    return ranked_memories
-                except json.JSONDecodeError as e:
-                    # FIXED: Better error handling for JSON parsing
-                    logger.warning(f"Failed to parse ranked indices: {e}")
-                    logger.warning(f"Response text: {response_text[:200]}...")
-                    
-                    # Try a simpler approach - just extract numbers
-                    try:
-                        numbers = re.findall(r'\d+', array_match.group(1))
-                        indices = [int(num) for num in numbers]
-                        valid_indices = [idx - 1 for idx in indices if 1 <= idx <= len(memories)]
-                        
-                        # Reorder memories based on the indices
-                        ranked_memories = [memories[idx] for idx in valid_indices if idx < len(memories)]
-                        
-                        # Add any memories that weren't ranked
-                        ranked_indices_set = set(valid_indices)
-                        for i in range(len(memories)):
-                            if i not in ranked_indices_set:
-                                ranked_memories.append(memories[i])
-                        
-                        return ranked_memories
-                    except Exception:
-                        logger.warning("Failed to extract numbers from response")
-                        return memories
+                # FIXED: Better error handling for JSON parsing
+                logger.warning("Failed to parse ranked indices as JSON")
+                logger.warning(f"Response text: {response_text[:200]}...")
+                
+                # Try a simpler approach - just extract numbers
+                indices = [int(num) for num in NUMBER_PATTERN.findall(array_match.group(1))]
+                self._cache_ranking(cache_key, indices)
+                
+                # Reorder memories based on the indices
+                return self._order_memories_by_indices(memories, indices)
             
             # If no array was found, fall back to the original order
             logger.warning("No ranked indices found, using original order")
@@ -313,6 +343,47 @@ class Relevancer:
             # Return memories in original order as a fallback
             return memories
             
+    def _cache_ranking(self, cache_key, indices):
+        """
+        Add ranked indices to the ranking cache, evicting the least recently used.
+        
+        Args:
+            cache_key (tuple): The (prompt text, memories text) the ranking is for.
+            indices (list): 1-based memory indices, most relevant first.
+        """
+        with self._ranking_cache_lock:
+            self._ranking_cache[cache_key] = tuple(indices)
+            self._ranking_cache.move_to_end(cache_key)
+            while len(self._ranking_cache) > self._ranking_cache_size:
+                self._ranking_cache.popitem(last=False)
+    
+    def _order_memories_by_indices(self, memories, indices):
+        """
+        Reorder memories by the 1-based indices returned by a ranking call.
+        
+        Invalid and repeated indices are skipped in the same pass that picks out
+        the ranked memories; memories that weren't ranked follow in their
+        original order.
+        
+        Args:
+            memories (list): The memories that were ranked.
+            indices (list): 1-based memory indices, most relevant first.
+            
+        Returns:
+            list: The memories in ranked order.
+        """
+        ranked_memories = []
+        ranked = [False] * len(memories)
+        for idx in indices:
+            # Convert 1-based indices to 0-based indices and filter out invalid indices
+            if isinstance(idx, int) and 1 <= idx <= len(memories) and not ranked[idx - 1]:
+                ranked[idx - 1] = True
+                ranked_memories.append(memories[idx - 1])
+        
+        # Add any memories that weren't ranked (as a fallback)
+        ranked_memories.extend(memory for memory, was_ranked in zip(memories, ranked) if not was_ranked)
+        return ranked_memories
+    
     def _extract_date_from_prompt(self, prompt_text):
         """
         Extract date information from the prompt text.
@@ -329,33 +400,14 @@ class Relevancer:
         # date extraction library in a production system
         
         # Check for common date query patterns
-        date_query_patterns = [
-            r'(?:what|when|how).{1,20}(?:on|at).{1,10}(\w+ \d{1,2},? \d{4})',
-            r'(?:what|when|how).{1,20}(?:on|at).{1,10}(\d{1,2} \w+ \d{4})',
-            r'(?:what|when|how).{1,20}(?:on|at).{1,10}(\d{4}-\d{2}-\d{2})',
-            r'(?:on|at) (\w+ \d{1,2},? \d{4})',
-            r'(?:on|at) (\d{1,2} \w+ \d{4})',
-            r'(?:on|at) (\d{4}-\d{2}-\d{2})'
-        ]
-        
-        for pattern in date_query_patterns:
-            match = re.search(pattern, prompt_text, re.IGNORECASE)
+        for pattern in DATE_QUERY_PATTERNS:
+            match = pattern.search(prompt_text)
             if match:
                 return True, match.group(1)
         
         # Check for relative time expressions
-        relative_time_patterns = [
-            (r'yesterday', 'yesterday'),
-            (r'last week', 'last week'),
-            (r'last month', 'last month'),
-            (r'today', 'today'),
-            (r'this morning', 'today'),
-            (r'this afternoon', 'today'),
-            (r'this evening', 'today')
-        ]
-        
-        for pattern, value in relative_time_patterns:
-            if re.search(pattern, prompt_text, re.IGNORECASE):
+        for pattern, value in RELATIVE_TIME_PATTERNS:
+            if pattern.search(prompt_text):
                 return True, value
                 
         return False, None
\ No newline at end of file
@@ -2,11 +2,49 @@
 Generates responses using Claude based on user input and relevant memories.
 """
 import logging
+import re
 import config
-from src.claude_client import create_claude_client
+from src.claude_client import create_claude_client, get_response_text
 
 logger = logging.getLogger(__name__)
 
+# System prompt, worded to prevent leaking of internal reasoning
+SYSTEM_PREAMBLE = """
+You are an AI assistant with access to memories from past interactions. 
+Your task is to generate a helpful, coherent, and contextually appropriate response to the user's input.
+
+The memories provided to you are from past interactions or stored knowledge.
+Use these memories when they're relevant to provide more personalized and contextually aware responses.
+You don't need to explicitly mention that you're using memories unless it adds value to your response.
+
+IMPORTANT: DO NOT include your internal reasoning or thinking process in your response.
+DO NOT start your response with phrases like "I'll acknowledge..." or other meta-commentary.
+Just provide the direct response to the user as if you were in a natural conversation.
+
+Keep your answers natural and conversational, as if you remember the context.
+"""
+
+MEMORIES_HEADER = "Here are some relevant memories that might help you provide a better response:\n\n"
+
+# User prompt template, kept explicit about expectations
+USER_PROMPT_TEMPLATE = "\n\nUser Input: {user_input}\n\nPlease provide a direct, helpful response without including your internal reasoning process."
+
+# Patterns that indicate internal reasoning leaked into the start of a response.
+# MemoryUpdater cleans stored responses with the same patterns.
+REASONING_PREFIXES = (
+    "I'll acknowledge", "Let me acknowledge", "I'll respond", 
+    "I should", "I'm going to", "I will now", "Let me provide",
+    "I'll give", "I need to", "I notice that", "I should respond",
+    "My response should"
+)
+REASONING_PREFIX_LENGTH = max(len(prefix) for prefix in REASONING_PREFIXES)
+# All the prefixes as one anchored pattern, matched once instead of a startswith per phrase
+REASONING_PREFIX_PATTERN = re.compile("|".join(re.escape(prefix) for prefix in REASONING_PREFIXES))
+# Where the leaked reasoning's first sentence may end
+SENTENCE_BREAKS = ('. ', '! ', '? ')
+
+FALLBACK_RESPONSE = "I'm having trouble generating a response right now. Let me try to help without accessing my memory. Could you please provide more details or ask your question in a different way?"
+
 class ResponseGenerator:
     """Generates responses using Claude based on user input and relevant memories."""
     
@@ -30,94 +68,15 @@ class ResponseGenerator:
         """
         logger.debug(f"Generating response for: {user_input}")
         
-        # Format the memories for inclusion in the prompt
-        memories_text = ""
-        if relevant_memories:
-            memories_text = "Here are some relevant memories that might help you provide a better response:\n\n"
-            for i, memory in enumerate(relevant_memories):
-                memory_content = memory.get("content", "")
-                memory_summary = memory.get("summary", "")
-                memory_timestamp = memory.get("timestamp", "")
-                
-                # Use summary if available, otherwise use content
-                memory_text = memory_summary if memory_summary else memory_content
-                
-                memories_text += f"Memory {i+1} (from {memory_timestamp}):\n{memory_text}\n\n"
-        
-        # FIXED: Modified system prompt to prevent leaking of internal reasoning
-        system_prompt = """
-        You are an AI assistant with access to memories from past interactions. 
-        Your task is to generate a helpful, coherent, and contextually appropriate response to the user's input.
-        
-        The memories provided to you are from past interactions or stored knowledge.
-        Use these memories when they're relevant to provide more personalized and contextually aware responses.
-        You don't need to explicitly mention that you're using memories unless it adds value to your response.
-        
-        IMPORTANT: DO NOT include your internal reasoning or thinking process in your response.
-        DO NOT start your response with phrases like "I'll acknowledge..." or other meta-commentary.
-        Just provide the direct response to the user as if you were in a natural conversation.
-        
-        Keep your answers natural and conversational, as if you remember the context.
-        """
-        
         try:
-            # FIXED: Ensure user prompt is clear about expectations
-            user_prompt = f"{memories_text}\n\nUser Input: {user_input}\n\nPlease provide a direct, helpful response without including your internal reasoning process."
-            
             # Use the client wrapper
-            response = self.client.messages_create(
-                model=self.model,
-                max_tokens=1024,
-                temperature=0.7,  # Higher temperature for more creative responses
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
+            response = self.client.messages_create(**self._build_request(user_input, relevant_memories))
             
             # Extract the text from the response
-            if hasattr(response, 'content') and isinstance(response.content, list) and len(response.content) > 0:
-                if isinstance(response.content[0], dict) and 'text' in response.content[0]:
-                    generated_response = response.content[0]['text'].strip()
-                elif hasattr(response.content[0], 'text'):
-                    generated_response = response.content[0].text.strip()
-                else:
-                    generated_response = str(response.content[0]).strip()
-            else:
-                generated_response = str(response).strip()
+            generated_response = get_response_text(response)
             
             # FIXED: Additional post-processing to remove any remaining internal reasoning
-            # Look for patterns that might indicate internal reasoning
-            patterns_to_check = [
-                "I'll acknowledge", "Let me acknowledge", "I'll respond", 
-                "I should", "I'm going to", "I will now", "Let me provide",
-                "I'll give", "I need to", "I notice that", "I should respond",
-                "My response should"
-            ]
-            
-            # Check if response starts with any of these patterns
-            for pattern in patterns_to_check:
-                if generated_response.startswith(pattern):
-                    # Try to find where the actual response begins (often in quotes)
-                    quote_start = generated_response.find('"')
-                    quote_end = generated_response.rfind('"')
-                    
-                    if quote_start != -1 and quote_end != -1 and quote_end > quote_start:
-                        # Extract the content within quotes
-                        direct_response = generated_response[quote_start+1:quote_end].strip()
-                        generated_response = direct_response
-                        break
-                    
-                    # Alternative: look for a clear sentence break
-                    sentence_breaks = ['. ', '! ', '? ']
-                    for break_char in sentence_breaks:
-                        first_break = generated_response.find(break_char)
-                        if first_break != -1:
-                            # Skip the first sentence which might be internal reasoning
-                            potential_direct = generated_response[first_break+2:].strip()
-                            if len(potential_direct) > 20:  # Ensure we're not cutting too much
-                                generated_response = potential_direct
-                                break
+            generated_response = self._remove_internal_reasoning(generated_response)
             
             logger.debug(f"Generated response: {generated_response}")
             return generated_response
@@ -125,4 +84,149 @@ class ResponseGenerator:
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             # Return a fallback response
-            return "I'm having trouble generating a response right now. Let me try to help without accessing my memory. Could you please provide more details or ask your question in a different way?"
\ No newline at end of file
+            return FALLBACK_RESPONSE
+    
+    def stream(self, user_input, relevant_memories):
+        """
+        Generate a response like generate(), yielding text chunks as they arrive.
+        
+        Output is held back until it is clear the response does not open with
+        internal reasoning. If it does, the whole response is buffered and
+        cleaned up before being yielded as a single chunk.
+        
+        Args:
+            user_input (str): The user's input.
+            relevant_memories (list): A list of relevant memories.
+            
+        Yields:
+            str: Chunks of the generated response.
+        """
+        logger.debug(f"Streaming response for: {user_input}")
+        
+        buffered_text = ""
+        # Chunks after the response is known to open with internal reasoning,
+        # joined once at the end instead of being appended to buffered_text
+        reasoning_chunks = []
+        streaming = False
+        try:
+            for chunk in self.client.messages_stream(**self._build_request(user_input, relevant_memories)):
+                if streaming:
+                    yield chunk
+                    continue
+                
+                if reasoning_chunks:
+                    reasoning_chunks.append(chunk)
+                    continue
+                
+                buffered_text += chunk
+                leading_text = buffered_text.lstrip()
+                if len(leading_text) >= REASONING_PREFIX_LENGTH:
+                    if leading_text.startswith(REASONING_PREFIXES):
+                        reasoning_chunks.append(buffered_text)
+                    else:
+                        streaming = True
+                        yield leading_text
+            
+            # The response was short or opened with internal reasoning
+            if not streaming:
+                if reasoning_chunks:
+                    buffered_text = "".join(reasoning_chunks)
+                yield self._remove_internal_reasoning(buffered_text.strip())
+                
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            # Only fall back if nothing has been shown to the user yet
+            if not streaming:
+                yield FALLBACK_RESPONSE
+    
+    def _build_request(self, user_input, relevant_memories):
+        """
+        Build the messages request for a response.
+        
+        Args:
+            user_input (str): The user's input.
+            relevant_memories (list): A list of relevant memories.
+            
+        Returns:
+            dict: Keyword arguments for the client wrapper.
+        """
+        # Format the memories for inclusion in the prompt
+        memories_text = self._format_memories_for_context(relevant_memories)
+        
+        user_prompt = USER_PROMPT_TEMPLATE.format(user_input=user_input)
+        
+        # Keep the memory context in its own block, marked as a cache breakpoint.
+        # The system prompt alone is far below the caching minimum, but with
+        # enough memory context the prefix up to here can be reused by repeated
+        # turns over the same memories.
+        user_content = []
+        if memories_text:
+            user_content.append({"type": "text", "text": memories_text, "cache_control": {"type": "ephemeral"}})
+        user_content.append({"type": "text", "text": user_prompt})
+        
+        return {
+            "model": self.model,
+            "max_tokens": 1024,
+            "temperature": 0.7,  # Higher temperature for more creative responses
+            "system": SYSTEM_PREAMBLE,
+            "messages": [
+                {"role": "user", "content": user_content}
+            ]
+        }
+    
+    def _format_memories_for_context(self, relevant_memories):
+        """
+        Format relevant memories as the memory context block of the prompt.
+        
+        Args:
+            relevant_memories (list): A list of relevant memories.
+            
+        Returns:
+            str: The memory context, or an empty string if there are no memories.
+        """
+        # Nothing to format on a cold start or when retrieval found nothing
+        if not relevant_memories:
+            return ""
+        
+        memory_parts = [MEMORIES_HEADER]
+        for i, memory in enumerate(relevant_memories):
+            # Use summary if available, otherwise use content
+            memory_text = memory.get("summary") or memory.get("content", "")
+            memory_timestamp = memory.get("timestamp", "")
+            
+            memory_parts.append(f"Memory {i+1} (from {memory_timestamp}):\n{memory_text}\n\n")
+        return "".join(memory_parts)
+    
+    def _remove_internal_reasoning(self, generated_response):
+        """
+        Remove internal reasoning that the model leaked at the start of a response.
+        
+        Args:
+            generated_response (str): The raw response text.
+            
+        Returns:
+            str: The cleaned response text.
+        """
+        # Check if response starts with any of the reasoning patterns
+        match = REASONING_PREFIX_PATTERN.match(generated_response)
+        if not match:
+            return generated_response
+        
+        # Try to find where the actual response begins (often in quotes)
+        quote_start = generated_response.find('"', match.end())
+        quote_end = generated_response.rfind('"')
+        
+        if quote_start != -1 and quote_end > quote_start:
+            # Extract the content within quotes
+            return generated_response[quote_start+1:quote_end].strip()
+        
+        # Alternative: look for a clear sentence break after the leaked prefix
+        for break_char in SENTENCE_BREAKS:
+            first_break = generated_response.find(break_char, match.end())
+            if first_break != -1:
+                # Skip the first sentence which might be internal reasoning
+                potential_direct = generated_response[first_break+2:].strip()
+                if len(potential_direct) > 20:  # Ensure we're not cutting too much
+                    return potential_direct
+        
+        return generated_response
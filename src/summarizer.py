@@ -4,10 +4,22 @@ Summarizer that uses Claude to create concise summaries of text.
 import logging
 import re
 import config
-from src.claude_client import create_claude_client
+from src.claude_client import create_claude_client, get_response_text
 
 logger = logging.getLogger(__name__)
 
+# Summarization instructions. They never change between calls, so they are built
+# once; the length limit goes with the text being summarized.
+SUMMARY_INSTRUCTIONS = """
+        Please create a concise and accurate summary of the following text. 
+        The summary should:
+        1. Capture the main points and key information
+        2. Be no longer than the maximum number of characters given after the text
+        3. Be written in third person, neutral tone
+        4. Not include meta-commentary or self-references
+        """
+SUMMARY_INSTRUCTIONS_BLOCK = {"type": "text", "text": SUMMARY_INSTRUCTIONS}
+
 class Summarizer:
     """Creates summaries of text using Claude."""
     
@@ -47,14 +59,8 @@ class Summarizer:
             return rule_based_summary
         
         # FIXED: Improved prompt with clear instructions
+        # Only this part of the prompt changes between calls
         prompt = f"""
-        Please create a concise and accurate summary of the following text. 
-        The summary should:
-        1. Capture the main points and key information
-        2. Be at most {max_length} characters
-        3. Be written in third person, neutral tone
-        4. Not include meta-commentary or self-references
-        
         Text: {text}
         
         Summary (max {max_length} characters):
@@ -67,20 +73,12 @@ class Summarizer:
                 max_tokens=1024,
                 temperature=0.3,  # Lower temperature for more deterministic summaries
                 messages=[
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": [SUMMARY_INSTRUCTIONS_BLOCK, {"type": "text", "text": prompt}]}
                 ]
             )
             
             # Extract the text from the response
-            if hasattr(response, 'content') and isinstance(response.content, list) and len(response.content) > 0:
-                if isinstance(response.content[0], dict) and 'text' in response.content[0]:
-                    summary = response.content[0]['text'].strip()
-                elif hasattr(response.content[0], 'text'):
-                    summary = response.content[0].text.strip()
-                else:
-                    summary = str(response.content[0]).strip()
-            else:
-                summary = str(response).strip()
+            summary = get_response_text(response)
             
             # FIXED: Post-process the summary to remove any potential meta-commentary
             summary = self._clean_summary(summary)
@@ -166,15 +164,17 @@ class Summarizer:
         # Split text into sentences
         sentences = re.split(r'(?<=[.!?])\s+', text)
         
-        summary = ""
+        # Collect the sentences that fit and join them once, tracking the
+        # joined length instead of rebuilding the summary for every sentence
+        summary_sentences = []
+        summary_length = 0
         for sentence in sentences:
-            if len(summary) + len(sentence) + 1 <= max_length:
-                if summary:
-                    summary += " " + sentence
-                else:
-                    summary = sentence
+            if summary_length + len(sentence) + 1 <= max_length:
+                summary_length += len(sentence) + (1 if summary_sentences else 0)
+                summary_sentences.append(sentence)
             else:
                 break
+        summary = " ".join(summary_sentences)
         
         # If we couldn't fit even one sentence, truncate
         if not summary:
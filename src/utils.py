@@ -5,23 +5,31 @@ import re
 import json
 import logging
 import os
+import uuid
 from datetime import datetime, timedelta
 import config
 
+# orjson parses and serializes several times faster than the standard library;
+# fall back to json when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fastest available JSON parser; both raise ValueError subclasses on bad input
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# json.dump builds a new encoder on every call when given options, so share one
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+# Decoder for pulling a JSON value out of surrounding text with raw_decode
+_JSON_DECODER = json.JSONDecoder()
+
 logger = logging.getLogger(__name__)
 
-def extract_dates_from_text(text):
-    """
-    Extract dates from text using regular expressions.
-    
-    Args:
-        text (str): The text to extract dates from.
-        
-    Returns:
-        list: A list of date strings found in the text.
-    """
-    # Common date formats
-    date_patterns = [
+# Common date formats, compiled once since every prompt and memory is scanned
+DATE_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
         # MM/DD/YYYY or DD/MM/YYYY
         r'\b\d{1,2}/\d{1,2}/\d{2,4}\b',
         # YYYY-MM-DD
@@ -36,11 +44,39 @@ def extract_dates_from_text(text):
         r'\b(?:next|last) (?:week|month|year)\b',
         # X days/weeks/months/years ago
         r'\b\d+ (?:day|week|month|year)s? ago\b'
-    ]
+    )
+)
+
+# Directories already created (or found to exist) by this process
+_known_directories = set()
+
+# Flags for creating a temporary file, failing rather than reusing one that exists
+_TMP_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+def ensure_directory(directory):
+    """
+    Create a directory if needed, skipping the syscall for directories already seen.
     
+    Args:
+        directory (str): The directory to create.
+    """
+    if directory and directory not in _known_directories:
+        os.makedirs(directory, exist_ok=True)
+        _known_directories.add(directory)
+
+def extract_dates_from_text(text):
+    """
+    Extract dates from text using regular expressions.
+    
+    Args:
+        text (str): The text to extract dates from.
+        
+    Returns:
+        list: A list of date strings found in the text.
+    """
     all_dates = []
-    for pattern in date_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in DATE_PATTERNS:
+        matches = pattern.findall(text)
         all_dates.extend(matches)
     
     return all_dates
@@ -49,20 +85,53 @@ def save_to_json_file(data, file_path):
     """
     Save data to a JSON file.
     
+    The data is written to a temporary file in the same directory and then
+    moved into place, so readers never see a partially written file.
+    
     Args:
         data (dict): The data to save.
         file_path (str): The path to the file.
+        
+    Returns:
+        bool: True if the data was saved, False otherwise.
     """
+    tmp_path = None
+    directory = os.path.dirname(file_path)
     try:
         # Ensure the directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        ensure_directory(directory)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Created with the same permissions open() would give the file, as the
+        # kernel applies the process's umask to the 0o666 mode
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        fd = os.open(tmp_path, _TMP_FILE_FLAGS, 0o666)
+        if orjson is not None:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(_JSON_ENCODER.encode(data))
+        os.replace(tmp_path, file_path)
+        tmp_path = None
         
         logger.debug(f"Data saved to {file_path}")
+        return True
+    except FileNotFoundError as e:
+        # The directory was removed after it was seen, so forget it and let
+        # the next save create it again
+        _known_directories.discard(directory)
+        logger.error(f"Error saving data to {file_path}: {e}")
+        return False
     except Exception as e:
         logger.error(f"Error saving data to {file_path}: {e}")
+        return False
+    finally:
+        # Don't leave a stray temporary file behind if the write failed
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 def load_from_json_file(file_path):
     """
@@ -79,8 +148,12 @@ def load_from_json_file(file_path):
         return None
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            with open(file_path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         logger.debug(f"Data loaded from {file_path}")
         return data
@@ -88,6 +161,65 @@ def load_from_json_file(file_path):
         logger.error(f"Error loading data from {file_path}: {e}")
         return None
 
+def _parse_json_value(text, opener, closer, value_type):
+    """
+    Parse a JSON value of the given type from a model response.
+    
+    The whole text is tried first, since responses asked to return only JSON
+    usually do; then the span from the first opener to the last closer; then
+    the first complete value starting at the first opener, which handles text
+    after the JSON that contains the closing character.
+    
+    Args:
+        text (str): The response text.
+        opener (str): The character the value starts with.
+        closer (str): The character the value ends with.
+        value_type (type): The type the parsed value must have.
+        
+    Returns:
+        object: The parsed value, or None if none could be parsed.
+    """
+    try:
+        parsed = _json_loads(text)
+    except ValueError:
+        start = text.find(opener)
+        end = text.rfind(closer)
+        if start == -1 or end <= start:
+            return None
+        try:
+            parsed = _json_loads(text[start:end + 1])
+        except ValueError:
+            try:
+                parsed, _ = _JSON_DECODER.raw_decode(text, start)
+            except ValueError:
+                return None
+    
+    return parsed if isinstance(parsed, value_type) else None
+
+def parse_json_array(text):
+    """
+    Parse a JSON array from a model response.
+    
+    Args:
+        text (str): The response text.
+        
+    Returns:
+        list: The parsed array, or None if no JSON array could be parsed.
+    """
+    return _parse_json_value(text, '[', ']', list)
+
+def parse_json_object(text):
+    """
+    Parse a JSON object from a model response.
+    
+    Args:
+        text (str): The response text.
+        
+    Returns:
+        dict: The parsed object, or None if no JSON object could be parsed.
+    """
+    return _parse_json_value(text, '{', '}', dict)
+
 def list_files_in_directory(directory, extension=None):
     """
     List all files in a directory, optionally filtered by extension.
@@ -103,33 +235,29 @@ def list_files_in_directory(directory, extension=None):
         logger.debug(f"Directory does not exist: {directory}")
         return []
     
+    # os.scandir exposes each entry's type from the directory listing itself,
+    # avoiding the extra stat calls os.walk makes to tell files from directories
     files = []
-    for root, _, filenames in os.walk(directory):
-        for filename in filenames:
-            if extension is None or filename.endswith(extension):
-                files.append(os.path.join(root, filename))
+    pending_directories = [directory]
+    while pending_directories:
+        current_directory = pending_directories.pop()
+        try:
+            with os.scandir(current_directory) as entries:
+                for entry in entries:
+                    # Symlinked directories aren't followed, as os.walk doesn't, so
+                    # a symlink loop can't recurse forever
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_directories.append(entry.path)
+                    elif entry.is_dir():
+                        continue
+                    elif extension is None or entry.name.endswith(extension):
+                        files.append(entry.path)
+        except OSError as e:
+            # Skip directories that can't be read, as os.walk does
+            logger.debug(f"Skipping unreadable directory {current_directory}: {e}")
     
     return files
 
-def get_days_since_timestamp(timestamp_str):
-    """
-    Calculate the number of days since a timestamp.
-    
-    Args:
-        timestamp_str (str): An ISO format timestamp string.
-        
-    Returns:
-        float: The number of days since the timestamp, or None if the timestamp is invalid.
-    """
-    try:
-        timestamp = datetime.fromisoformat(timestamp_str)
-        now = datetime.now()
-        delta = now - timestamp
-        return delta.total_seconds() / (60 * 60 * 24)  # Convert seconds to days
-    except (ValueError, TypeError) as e:
-        logger.error(f"Error calculating days since timestamp {timestamp_str}: {e}")
-        return None
-
 def generate_unique_filename(prefix, extension='.json'):
     """
     Generate a unique filename using the current timestamp.
@@ -0,0 +1,110 @@
+"""
+Shared fixtures for the REMIND tests.
+"""
+import sys
+import types
+import pytest
+
+# config.py is generated by setup.py rather than checked in, so give the tests
+# an empty one to fill in when it hasn't been generated
+try:
+    import config
+except ImportError:
+    config = types.ModuleType("config")
+    sys.modules["config"] = config
+
+@pytest.fixture
+def memory_config(tmp_path, monkeypatch):
+    """
+    Point the memory settings at a temporary directory.
+
+    Returns:
+        module: The config module.
+    """
+    memory_dir = tmp_path / "memory"
+    monkeypatch.setattr(config, "EPISODIC_MEMORY_DIR", str(memory_dir / "episodic"), raising=False)
+    monkeypatch.setattr(config, "NON_EPISODIC_MEMORY_DIR", str(memory_dir / "non_episodic"), raising=False)
+    monkeypatch.setattr(config, "MAX_EPISODIC_MEMORIES", 1000, raising=False)
+    monkeypatch.setattr(config, "MAX_NON_EPISODIC_MEMORIES", 1000, raising=False)
+    monkeypatch.setattr(config, "MEMORY_RETENTION_DAYS", 30, raising=False)
+    return config
+
+# Length of the chunks FakeClient streams responses in
+STREAM_CHUNK_LENGTH = 5
+
+class FakeClient:
+    """Stands in for the Claude client wrapper, answering requests with a callback."""
+
+    def __init__(self, respond):
+        """
+        Initialize the FakeClient.
+
+        Args:
+            respond (callable): Called with each request's keyword arguments,
+                returning the response text.
+        """
+        self.respond = respond
+        self.requests = []
+        self.batches = []
+
+    def messages_create(self, **kwargs):
+        from src.claude_client import MessageResponse
+        self.requests.append(kwargs)
+        return MessageResponse([{"type": "text", "text": self.respond(kwargs)}])
+
+    def messages_stream(self, **kwargs):
+        self.requests.append(kwargs)
+        text = self.respond(kwargs)
+        for start in range(0, len(text), STREAM_CHUNK_LENGTH):
+            yield text[start:start + STREAM_CHUNK_LENGTH]
+
+    def messages_batch(self, requests):
+        self.batches.append(requests)
+        return [self.messages_create(**request) for request in requests]
+
+def request_text(request):
+    """
+    Get the text of a request's user message.
+
+    Args:
+        request (dict): The keyword arguments of a messages_create call.
+
+    Returns:
+        str: The message text, with its content blocks joined.
+    """
+    content = request["messages"][-1]["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block["text"] for block in content)
+
+@pytest.fixture
+def claude_config(monkeypatch):
+    """
+    Fill in the model and hook settings the Claude-backed components read.
+
+    Returns:
+        module: The config module.
+    """
+    monkeypatch.setattr(config, "CLAUDE_MODEL", "test-model", raising=False)
+    monkeypatch.setattr(config, "CLAUDE_FAST_MODEL", "test-fast-model", raising=False)
+    monkeypatch.setattr(config, "MAX_HOOKS_PER_MEMORY", 10, raising=False)
+    monkeypatch.setattr(config, "MIN_HOOK_LENGTH", 2, raising=False)
+    monkeypatch.setattr(config, "MAX_HOOK_LENGTH", 30, raising=False)
+    monkeypatch.setattr(config, "MAX_MEMORIES_TO_RETRIEVE", 2, raising=False)
+    return config
+
+@pytest.fixture
+def fake_client(claude_config, monkeypatch):
+    """
+    Give every component a FakeClient instead of a real Claude client.
+
+    Tests set ``fake_client.respond`` to decide the response texts; by
+    default every request gets an empty JSON array.
+
+    Returns:
+        FakeClient: The client shared by all components.
+    """
+    client = FakeClient(lambda request: "[]")
+    for module in ("hook_generator", "summarizer", "memory_updater", "relevancer", "metadata_extractor", "response_generator"):
+        monkeypatch.setattr(f"src.{module}.create_claude_client", lambda: client)
+    return client
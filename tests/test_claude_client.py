@@ -0,0 +1,111 @@
+"""
+Tests for the Claude client wrapper's batching and response cache.
+"""
+import sys
+import types
+from types import SimpleNamespace
+import pytest
+import config
+from src.claude_client import MessageResponse, ResponseCache, create_claude_client, get_response_text
+
+class FakeBatches:
+    """Stands in for the SDK's message batches resource."""
+
+    def __init__(self, statuses, results):
+        self.statuses = list(statuses)
+        self.results_by_id = results
+        self.cancelled = []
+
+    def create(self, requests):
+        self.requests = requests
+        return SimpleNamespace(id="batch", processing_status=self.statuses.pop(0))
+
+    def retrieve(self, batch_id):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    def results(self, batch_id):
+        return self.results_by_id
+
+    def cancel(self, batch_id):
+        self.cancelled.append(batch_id)
+
+def _result(custom_id, text=None):
+    if text is None:
+        return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="errored"))
+    message = MessageResponse([{"type": "text", "text": text}])
+    return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="succeeded", message=message))
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    Create a client wrapper around a fake SDK client.
+
+    Returns:
+        object: The client wrapper, whose SDK client answers
+            messages.create calls with "individual".
+    """
+    monkeypatch.setitem(sys.modules, "anthropic", types.ModuleType("anthropic"))
+    monkeypatch.setattr(config, "CLAUDE_API_KEY", "test-key", raising=False)
+    monkeypatch.setattr(config, "CLAUDE_MODEL", "test-model", raising=False)
+    monkeypatch.setattr(config, "RESPONSE_CACHE_PATH", None, raising=False)
+    create_claude_client.cache_clear()
+    client = create_claude_client()
+    client._client = SimpleNamespace(messages=SimpleNamespace(
+        create=lambda **kwargs: MessageResponse([{"type": "text", "text": "individual"}])
+    ))
+    client._client_type = "modern_anthropic"
+    yield client
+    create_claude_client.cache_clear()
+
+def _requests(count):
+    return [{"messages": [{"role": "user", "content": str(i)}], "max_tokens": 10} for i in range(count)]
+
+def test_messages_batch_orders_results(client):
+    batches = FakeBatches(["in_progress", "ended"], [_result("2", "c"), _result("0", "a"), _result("1")])
+    client._client.messages.batches = batches
+
+    responses = client.messages_batch(_requests(3), poll_interval=0)
+
+    assert get_response_text(responses[0]) == "a" and responses[1] is None
+    assert get_response_text(responses[2]) == "c"
+    assert batches.requests[0]["params"]["model"] == "test-model"
+
+def test_messages_batch_cancels_after_max_wait(client):
+    batches = FakeBatches(["in_progress"], [])
+    client._client.messages.batches = batches
+
+    responses = client.messages_batch(_requests(2), poll_interval=0, max_wait=0)
+
+    assert batches.cancelled == ["batch"]
+    assert [get_response_text(response) for response in responses] == ["individual", "individual"]
+
+def test_response_cache_key_ignores_transport_params():
+    params = {"model": "test-model", "messages": [{"role": "user", "content": "hi"}]}
+
+    assert ResponseCache.make_key(params) == ResponseCache.make_key(dict(params, timeout=5))
+    assert ResponseCache.make_key(params) != ResponseCache.make_key(dict(params, temperature=0.2))
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, MessageResponse([{"type": "text", "text": key}]))
+    # Reading "a" makes "b" the least recently used
+    assert get_response_text(cache.get("a")) == "a"
+
+    cache.put("c", MessageResponse([{"type": "text", "text": "c"}]))
+
+    assert cache.get("b") is None
+    assert get_response_text(cache.get("a")) == "a" and get_response_text(cache.get("c")) == "c"
+
+def test_messages_create_serves_repeated_requests_from_the_cache(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RESPONSE_CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr("src.claude_client._response_cache", None)
+    calls = []
+    client._client.messages.create = lambda **kwargs: calls.append(kwargs) or MessageResponse([{"type": "text", "text": "fresh"}])
+    messages = [{"role": "user", "content": "hi"}]
+
+    responses = [client.messages_create(messages=messages), client.messages_create(messages=messages)]
+
+    assert [get_response_text(response) for response in responses] == ["fresh", "fresh"]
+    assert len(calls) == 1
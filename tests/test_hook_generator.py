@@ -0,0 +1,61 @@
+"""
+Tests for hook generation.
+"""
+from src.hook_generator import HookGenerator
+from tests.conftest import request_text
+
+# Short enough that the basic hooks alone don't fill max_hooks
+TEXT = "Hiking in Yosemite with Maria."
+
+def test_generate_hooks_combines_generated_and_basic_hooks(fake_client):
+    fake_client.respond = lambda request: '["mountain hiking", "national parks", "Mountain Hiking "]'
+    generator = HookGenerator()
+
+    hooks = generator.generate_hooks(TEXT)
+
+    assert hooks[:2] == ["mountain hiking", "national parks"]
+    assert "maria" in hooks
+    assert len(hooks) <= generator.max_hooks
+    assert len(set(hooks)) == len(hooks)
+    assert len(fake_client.requests) == 1
+
+def test_generate_hooks_reuses_cached_hooks(fake_client):
+    fake_client.respond = lambda request: '["hiking"]'
+    generator = HookGenerator()
+
+    first = generator.generate_hooks(TEXT)
+    first.append("changed by the caller")
+    second = generator.generate_hooks("  " + TEXT.replace(" ", "  "))
+
+    assert second == first[:-1]
+    assert len(fake_client.requests) == 1
+    # Case changes the hooks, so it isn't normalized away
+    generator.generate_hooks(TEXT.upper())
+    assert len(fake_client.requests) == 2
+
+def test_generate_hooks_falls_back_to_basic_hooks(fake_client):
+    def fail(request):
+        raise RuntimeError("API unavailable")
+    fake_client.respond = fail
+    generator = HookGenerator()
+
+    hooks = generator.generate_hooks(TEXT)
+
+    assert hooks
+    assert all(generator.min_hook_length <= len(hook) <= generator.max_hook_length for hook in hooks)
+
+def test_generate_hooks_batch_keeps_order(fake_client):
+    fake_client.respond = lambda request: '["tea"]' if "tea" in request_text(request) else '["coffee"]'
+    generator = HookGenerator()
+
+    tea_hooks, coffee_hooks = generator.generate_hooks_batch(["I like tea.", "I like coffee."])
+
+    assert tea_hooks[0] == "tea"
+    assert coffee_hooks[0] == "coffee"
+
+def test_filter_hooks_drops_duplicates_and_out_of_range_lengths(fake_client):
+    generator = HookGenerator()
+
+    hooks = generator.filter_hooks(["tea", "a", "tea", "x" * 31, "green tea"])
+
+    assert hooks == ["tea", "green tea"]
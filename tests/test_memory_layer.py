@@ -0,0 +1,131 @@
+"""
+Tests for the memory layer's hook index and date filters.
+"""
+import json
+import os
+import shutil
+from datetime import date
+import pytest
+from src.memory_layer import MemoryLayer
+from src.utils import save_to_json_file
+
+def _contents(memories):
+    return sorted(memory["content"] for memory in memories)
+
+def test_hook_index_store_query_delete_reload(memory_config):
+    layer = MemoryLayer()
+    tea_path = layer.store_episodic_memory({"content": "tea", "hooks": ["Green Tea", "drinks"]})
+    layer.store_episodic_memory({"content": "coffee", "hooks": ["coffee", "drinks"]})
+
+    assert _contents(layer.get_episodic_memories(hooks=["green tea"])) == ["tea"]
+    assert _contents(layer.get_episodic_memories(hooks=["DRINKS"])) == ["coffee", "tea"]
+
+    assert layer.delete_memory(tea_path)
+    assert layer.get_episodic_memories(hooks=["green tea"]) == []
+    assert "green tea" not in layer.get_all_hooks()
+
+    # A new MemoryLayer picks the index up from disk instead of rebuilding it
+    index_path = os.path.join(os.path.dirname(memory_config.EPISODIC_MEMORY_DIR), "hooks_index.json")
+    with open(index_path, encoding="utf-8") as f:
+        saved_index = json.load(f)
+    assert tea_path not in saved_index and len(saved_index) == 1
+
+    reloaded = MemoryLayer()
+    assert set(reloaded._indexed_hooks) == set(saved_index)
+    assert _contents(reloaded.get_episodic_memories(hooks=["drinks"])) == ["coffee"]
+
+def test_hook_filter_normalizes_hand_written_files(memory_config):
+    save_to_json_file(
+        {"content": "written elsewhere", "hooks": ["Tea", {"not": "a hook"}], "timestamp": "2026-01-01T10:00:00"},
+        os.path.join(memory_config.EPISODIC_MEMORY_DIR, "episodic_manual.json")
+    )
+    layer = MemoryLayer()
+
+    assert _contents(layer.get_episodic_memories(hooks=["tea"])) == ["written elsewhere"]
+
+def test_sync_unindexes_deleted_files_in_subdirectories(memory_config):
+    nested_path = os.path.join(memory_config.EPISODIC_MEMORY_DIR, "archive", "episodic_old.json")
+    save_to_json_file({"content": "nested", "hooks": ["tea"], "timestamp": "2026-01-01T10:00:00"}, nested_path)
+    layer = MemoryLayer()
+    assert _contents(layer.get_episodic_memories(hooks=["tea"])) == ["nested"]
+
+    os.remove(nested_path)
+    layer.get_episodic_memories(hooks=["tea"])
+
+    assert nested_path not in layer._indexed_hooks
+
+def test_max_count_skips_files_that_fail_to_load(memory_config):
+    layer = MemoryLayer()
+    paths = [
+        layer.store_episodic_memory({"content": str(day), "hooks": ["day"], "timestamp": f"2026-01-0{day}T10:00:00"})
+        for day in range(1, 5)
+    ]
+    with open(paths[-1], "w", encoding="utf-8") as f:
+        f.write("not json")
+
+    memories = layer.get_episodic_memories(max_count=2)
+
+    assert [memory["content"] for memory in memories] == ["3", "2"]
+
+def test_store_recreates_a_removed_directory(memory_config):
+    layer = MemoryLayer()
+    layer.store_episodic_memory({"content": "first", "hooks": ["tea"]})
+    shutil.rmtree(memory_config.EPISODIC_MEMORY_DIR)
+
+    # The first save after the directory disappears fails and isn't indexed
+    failed_path = layer.store_episodic_memory({"content": "lost", "hooks": ["tea"]})
+    assert failed_path is None
+
+    stored_path = layer.store_episodic_memory({"content": "second", "hooks": ["tea"]})
+    assert stored_path is not None and os.path.exists(stored_path)
+    assert _contents(layer.get_episodic_memories(hooks=["tea"])) == ["second"]
+
+@pytest.mark.parametrize("date_filter, expected", [
+    ("today", (date(2025, 4, 14), date(2025, 4, 14))),
+    ("yesterday", (date(2025, 4, 13), date(2025, 4, 13))),
+    ("last week", (date(2025, 4, 7), date(2025, 4, 13))),
+    ("2025-04-13", (date(2025, 4, 13), date(2025, 4, 13))),
+    ("April 13, 2025", (date(2025, 4, 13), date(2025, 4, 13))),
+    ("apr 13 2025", (date(2025, 4, 13), date(2025, 4, 13))),
+    ("13th of April 2025", (date(2025, 4, 13), date(2025, 4, 13))),
+    ("April 2025", (date(2025, 4, 1), date(2025, 4, 30))),
+    ("February 30, 2025", (date.max, date.min)),
+    ("2025-02-30", (date.max, date.min)),
+    ("what?", (date.max, date.min)),
+    ("april 13", None),
+])
+def test_resolve_date_filter(memory_config, date_filter, expected):
+    layer = MemoryLayer()
+
+    assert layer._resolve_date_filter(date_filter, today=date(2025, 4, 14)) == expected
+
+def test_date_filter_loads_only_matching_memories(memory_config):
+    layer = MemoryLayer()
+    layer.store_episodic_memory({"content": "match", "hooks": ["day"], "timestamp": "2025-04-13T10:00:00"})
+    layer.store_episodic_memory({"content": "other", "hooks": ["day"], "timestamp": "2025-04-12T10:00:00"})
+
+    assert _contents(layer.get_episodic_memories(date_filter="April 13, 2025")) == ["match"]
+    # Text filters that aren't a full date still match the formatted dates
+    assert _contents(layer.get_episodic_memories(date_filter="april 13")) == ["match"]
+
+def test_reindexing_a_file_drops_its_old_hooks(memory_config):
+    layer = MemoryLayer()
+    path = layer.store_non_episodic_memory({"content": "first", "hooks": ["tea"]})
+    layer._index_memory(path, {"content": "second", "hooks": ["coffee"]})
+
+    assert "tea" not in layer.get_all_hooks()
+    assert layer._hook_index["coffee"] == {path}
+
+def test_sync_reindexes_files_changed_on_disk(memory_config):
+    layer = MemoryLayer()
+    path = layer.store_episodic_memory({"content": "tea", "hooks": ["tea"], "timestamp": "2026-01-01T10:00:00"})
+    mtime_ns = os.stat(path).st_mtime_ns
+
+    # Rewritten by another process, which a new MemoryLayer must notice even
+    # though the file is in the saved index
+    save_to_json_file({"content": "coffee", "hooks": ["coffee"], "timestamp": "2026-01-01T10:00:00"}, path)
+    os.utime(path, ns=(mtime_ns + 1_000_000_000, mtime_ns + 1_000_000_000))
+    reloaded = MemoryLayer()
+
+    assert _contents(reloaded.get_episodic_memories(hooks=["coffee"])) == ["coffee"]
+    assert reloaded.get_episodic_memories(hooks=["tea"]) == []
@@ -0,0 +1,82 @@
+"""
+Tests for memory extraction from interactions.
+"""
+import pytest
+from src.memory_layer import MemoryLayer
+from src.memory_updater import MemoryUpdater
+from tests.conftest import request_text
+
+# Long enough that interactions aren't skipped as small talk
+ASSISTANT_REPLY = "Thanks for telling me, I'll keep that in mind for our future conversations about it."
+
+def _contents(memories):
+    return sorted(memory["content"] for memory in memories)
+
+@pytest.fixture
+def updater(memory_config, fake_client):
+    updater = MemoryUpdater(MemoryLayer())
+    yield updater
+    updater.executor.shutdown()
+
+@pytest.mark.parametrize("user_input", [
+    "The office wifi password is hunter2.",
+    "We moved to Berlin last year and our kids love it.",
+    "I love pizza, do you?",
+    "What should I cook tonight? I have rice and eggs.",
+])
+def test_needs_extraction_for_statements(updater, user_input):
+    assert updater._needs_extraction(f"User: {user_input}\n\nAssistant: {ASSISTANT_REPLY}")
+
+@pytest.mark.parametrize("interaction_text", [
+    f"User: What is the capital of France?\n\nAssistant: {ASSISTANT_REPLY}",
+    f"User: How are you? Can you help me with Python?\n\nAssistant: {ASSISTANT_REPLY}",
+    "User: Hi!\n\nAssistant: Hello!",
+])
+def test_no_extraction_for_questions_and_small_talk(updater, interaction_text):
+    assert not updater._needs_extraction(interaction_text)
+
+def _extraction_response(request):
+    # Extraction requests are the only ones that send the interaction
+    if "Interaction:" not in request_text(request):
+        return "[]"
+    if "wifi" in request_text(request):
+        return '[{"memory": "The office wifi password is hunter2", "hooks": ["wifi password"]}]'
+    return '[{"memory": "User moved to Berlin", "hooks": ["berlin"]}]'
+
+def test_update_batch_extracts_in_one_batch(updater, fake_client):
+    fake_client.respond = _extraction_response
+
+    results = updater.update_batch([
+        ("The office wifi password is hunter2.", ASSISTANT_REPLY, None),
+        ("What is the capital of France?", ASSISTANT_REPLY, None),
+        ("We moved to Berlin last year and our kids love it.", ASSISTANT_REPLY, "conversation"),
+        ("", ASSISTANT_REPLY, None),
+    ])
+
+    # The question and the empty interaction make no extraction request
+    assert len(fake_client.batches) == 1 and len(fake_client.batches[0]) == 2
+    assert [len(paths) for _, paths in results] == [1, 0, 1, 0]
+    assert all(path is not None for path, _ in results[:3]) and results[3][0] is None
+
+    facts = _contents(updater.memory_layer.get_non_episodic_memories(hooks=["wifi password"]))
+    assert facts == ["The office wifi password is hunter2"]
+
+def test_update_stores_episodic_and_extracted_memories(updater, fake_client):
+    fake_client.respond = _extraction_response
+
+    episodic_path, non_episodic_paths = updater.update("The office wifi password is hunter2.", ASSISTANT_REPLY, "conversation")
+
+    layer = updater.memory_layer
+    episodic = layer.get_episodic_memories()
+    assert episodic_path is not None and len(non_episodic_paths) == 1
+    assert [memory["conversation_id"] for memory in episodic] == ["conversation"]
+    assert episodic[0]["content"].startswith("User: The office wifi password is hunter2.")
+    assert _contents(layer.get_non_episodic_memories(hooks=["wifi password"])) == ["The office wifi password is hunter2"]
+
+def test_update_skips_extraction_for_questions(updater, fake_client):
+    fake_client.respond = _extraction_response
+
+    episodic_path, non_episodic_paths = updater.update("What is the capital of France?", ASSISTANT_REPLY)
+
+    assert episodic_path is not None and non_episodic_paths == []
+    assert not any("Interaction:" in request_text(request) for request in fake_client.requests)
@@ -0,0 +1,48 @@
+"""
+Tests for memory retrieval and ranking.
+"""
+import pytest
+from src.memory_layer import MemoryLayer
+from src.relevancer import Relevancer
+from tests.conftest import request_text
+
+def _is_ranking(request):
+    return "Here are the available memories" in request_text(request)
+
+@pytest.fixture
+def relevancer(memory_config, fake_client):
+    fake_client.respond = lambda request: "[3, 1]" if _is_ranking(request) else "[]"
+    layer = MemoryLayer()
+    # Non-episodic filenames come from the first hook, so each gets its own
+    for content in ("green tea", "black tea", "tea ceremony"):
+        layer.store_non_episodic_memory({"content": content, "hooks": [content, "tea"], "timestamp": "2026-01-01T10:00:00"})
+    return Relevancer(layer)
+
+def test_ranking_is_cached_for_repeated_queries(relevancer, fake_client):
+    first = relevancer.retrieve({"original_prompt": "tea"})
+    second = relevancer.retrieve({"original_prompt": "tea"})
+
+    assert [memory["content"] for memory in first] == [memory["content"] for memory in second]
+    assert len(first) == 2
+    assert sum(_is_ranking(request) for request in fake_client.requests) == 1
+
+def test_changed_memories_are_ranked_again(relevancer, fake_client):
+    relevancer.retrieve({"original_prompt": "tea"})
+    relevancer.memory_layer.store_non_episodic_memory({"content": "iced tea", "hooks": ["iced tea", "tea"]})
+    relevancer.retrieve({"original_prompt": "tea"})
+
+    assert sum(_is_ranking(request) for request in fake_client.requests) == 2
+
+def test_specific_date_queries_use_the_date_filter(relevancer, fake_client):
+    layer = relevancer.memory_layer
+    layer.store_episodic_memory({"content": "museum trip", "hooks": ["museum"], "timestamp": "2025-04-13T15:00:00"})
+    layer.store_episodic_memory({"content": "dentist", "hooks": ["dentist"], "timestamp": "2025-04-12T09:00:00"})
+
+    memories = relevancer.retrieve({
+        "original_prompt": "What did we do on April 13, 2025?",
+        "metadata": {"dates": ["April 13, 2025"]}
+    })
+
+    # Few enough memories from that date are returned without a ranking call
+    assert [memory["content"] for memory in memories] == ["museum trip"]
+    assert not any(_is_ranking(request) for request in fake_client.requests)
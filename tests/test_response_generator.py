@@ -0,0 +1,41 @@
+"""
+Tests for response generation and streaming.
+"""
+import pytest
+from src.response_generator import FALLBACK_RESPONSE, ResponseGenerator
+
+REPLY = "Hello there, it is lovely to hear from you again!"
+
+@pytest.fixture
+def generator(fake_client):
+    return ResponseGenerator()
+
+def test_stream_yields_chunks_once_the_opening_is_clear(generator, fake_client):
+    fake_client.respond = lambda request: REPLY
+
+    chunks = list(generator.stream("Hi", []))
+
+    assert "".join(chunks) == REPLY
+    assert len(chunks) > 1
+
+def test_stream_buffers_and_cleans_leaked_reasoning(generator, fake_client):
+    fake_client.respond = lambda request: f"I'll respond warmly to the greeting. {REPLY}"
+
+    assert list(generator.stream("Hi", [])) == [REPLY]
+
+def test_stream_yields_short_responses_whole(generator, fake_client):
+    fake_client.respond = lambda request: "  Hi!"
+
+    assert list(generator.stream("Hi", [])) == ["Hi!"]
+
+def test_stream_falls_back_before_any_output(generator, fake_client):
+    def fail(request):
+        raise RuntimeError("stream failed")
+    fake_client.respond = fail
+
+    assert list(generator.stream("Hi", [])) == [FALLBACK_RESPONSE]
+
+def test_generate_removes_leaked_reasoning(generator, fake_client):
+    fake_client.respond = lambda request: f'I should greet them. "{REPLY}"'
+
+    assert generator.generate("Hi", []) == REPLY
@@ -0,0 +1,47 @@
+"""
+Tests for the JSON and file helpers in src.utils.
+"""
+import os
+import stat
+import pytest
+from src.utils import list_files_in_directory, parse_json_array, parse_json_object, save_to_json_file
+
+@pytest.mark.parametrize("text, expected", [
+    ('["a", "b"]', ["a", "b"]),
+    ('Here are the hooks: ["a", "b"]. Hope that helps!', ["a", "b"]),
+    ('["a"] and later [1]', ["a"]),
+    ('{"not": "an array"}', None),
+    ("no json here", None),
+])
+def test_parse_json_array(text, expected):
+    assert parse_json_array(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"sentiment": "positive"}', {"sentiment": "positive"}),
+    ('Result:\n{"keywords": ["tea"]}\nDone {sort of}', {"keywords": ["tea"]}),
+    ('["not", "an object"]', None),
+    ("{broken", None),
+])
+def test_parse_json_object(text, expected):
+    assert parse_json_object(text) == expected
+
+def test_save_to_json_file_uses_umask_permissions(tmp_path):
+    file_path = str(tmp_path / "saved" / "data.json")
+
+    assert save_to_json_file({"a": 1}, file_path)
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o666 & ~umask
+    assert os.listdir(tmp_path / "saved") == ["data.json"]
+
+def test_list_files_in_directory_does_not_follow_symlinked_directories(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "top.json").write_text("{}")
+    (tmp_path / "nested" / "inner.json").write_text("{}")
+    (tmp_path / "notes.txt").write_text("")
+    os.symlink(tmp_path, tmp_path / "nested" / "loop.json")
+
+    files = list_files_in_directory(str(tmp_path), ".json")
+
+    assert sorted(files) == [str(tmp_path / "nested" / "inner.json"), str(tmp_path / "top.json")]
@@ -15,6 +15,11 @@ from src.memory_updater import MemoryUpdater
 
 logger = logging.getLogger(__name__)
 
+# The app can be imported directly by a WSGI server or `flask run` rather than
+# through main.py, so make sure logging is configured either way. This does
+# nothing if main.py has already set it up.
+config.setup_logging()
+
 app = Flask(__name__)
 
 # Initialize components